@@ -539,7 +539,7 @@ def get_workflow_results(session_id):
         # Conta screenshots
         files_dir = f"analyses_data/files/{session_id}"
         if os.path.exists(files_dir):
-            screenshots = [f for f in os.listdir(files_dir) if f.endswith('.png')]
+            screenshots = [f for f in os.listdir(files_dir) if f.endswith(('.png', '.jpg'))]
             results["screenshots_captured"] = len(screenshots)
             results["screenshots_list"] = screenshots
 
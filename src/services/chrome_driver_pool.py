@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Chrome Driver Pool
+Pool de drivers Chrome reutilizados entre capturas de screenshots simultâneas
+e utilitários CDP compartilhados pelos módulos de captura
+"""
+
+import os
+import base64
+import itertools
+import logging
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Viewport (largura, altura, mobile) de cada plataforma; as demais usam DEFAULT_VIEWPORT
+PLATFORM_VIEWPORTS = {
+    'instagram': (414, 896, True),
+    'twitter': (1200, 800, False),
+    'linkedin': (1200, 900, False),
+    'youtube': (1280, 720, False),
+}
+DEFAULT_VIEWPORT = (1920, 1080, False)
+
+# Cache HTTP em disco dos Chromes de captura: CSS/JS/fontes das redes sociais
+# são reaproveitados entre posts, sessões e reinícios do serviço em vez de baixados a cada página
+CHROME_DISK_CACHE_ROOT = os.path.join(tempfile.gettempdir(), "v40_chrome_cache")
+CHROME_DISK_CACHE_SIZE = 512 * 1024 * 1024
+# Caches sem uso há mais que isso são apagados quando um pool é criado
+CHROME_DISK_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+def disk_cache_dir(name: str, slot: int) -> str:
+    """Diretório de cache da vaga `slot` do pool `name` (o mesmo entre drivers recriados e reinícios)"""
+    return os.path.join(CHROME_DISK_CACHE_ROOT, f"{name}_{slot}")
+
+def _lock_cache_dir(cache_dir: str) -> Optional[IO]:
+    """
+    Trava o cache com um lock exclusivo em `<cache_dir>.lock`
+
+    O cache do Chrome não pode ser usado por dois navegadores ao mesmo tempo: retorna
+    None se outro processo vivo já o trava. O lock é do sistema operacional, então é
+    liberado mesmo se o processo morrer sem passar pelo atexit; fechar o arquivo o libera.
+    """
+    lock_file = open(f"{cache_dir}.lock", "a+b")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def _prune_stale_disk_caches(name: str):
+    """
+    Apaga caches do pool `name` sem uso há mais de CHROME_DISK_CACHE_MAX_AGE
+
+    Também remove diretórios em formatos antigos (`<name>_<pid>_<vaga>`); caches
+    travados por um processo vivo nunca são apagados.
+    """
+    os.makedirs(CHROME_DISK_CACHE_ROOT, exist_ok=True)
+    cutoff = time.time() - CHROME_DISK_CACHE_MAX_AGE
+    prefix = f"{name}_"
+    with os.scandir(CHROME_DISK_CACHE_ROOT) as entries:
+        candidates = [
+            entry for entry in entries
+            if entry.name.startswith(prefix) and entry.is_dir(follow_symlinks=False)
+        ]
+
+    for entry in candidates:
+        current_format = entry.name[len(prefix):].isdigit()
+        if current_format:
+            # O lock é tocado a cada uso da vaga; o diretório em si quase não muda de mtime
+            try:
+                last_used = os.stat(f"{entry.path}.lock").st_mtime
+            except OSError:
+                last_used = entry.stat(follow_symlinks=False).st_mtime
+            if last_used >= cutoff:
+                continue
+
+        lock = _lock_cache_dir(entry.path)
+        if lock is None:
+            continue
+        try:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            if not current_format:
+                os.unlink(lock.name)
+        finally:
+            lock.close()
+        logger.info(f"🧹 Cache em disco do Chrome removido: {entry.name}")
+
+def add_disk_cache_arguments(chrome_options: Any, cache_dir: Optional[str]):
+    """Aponta o Chrome para o cache em disco `cache_dir` (drivers fora de um pool usam o cache padrão)"""
+    if not cache_dir:
+        return
+    chrome_options.add_argument(f"--disk-cache-dir={cache_dir}")
+    chrome_options.add_argument(f"--disk-cache-size={CHROME_DISK_CACHE_SIZE}")
+
+# Analytics, anúncios e vídeos não aparecem no recorte do post; bloqueá-los reduz
+# bytes e requisições até o readyState. CDNs das plataformas (cdninstagram.com,
+# twimg.com, licdn.com, ytimg.com) continuam liberados para o post renderizar.
+BLOCKED_URL_PATTERNS = [
+    "*google-analytics.com*",
+    "*doubleclick.net*",
+    "*facebook.net/*/fbevents*",
+    "*googletagmanager.com*",
+    "*scorecardresearch.com*",
+    "*.mp4",
+    "*.webm",
+]
+
+def block_tracking_urls(driver: Any):
+    """Bloqueia no driver as URLs de BLOCKED_URL_PATTERNS (vale para todas as páginas seguintes)"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+def clear_browser_cookies(driver: Any):
+    """
+    Apaga os cookies de todos os domínios do navegador (Network.clearBrowserCookies)
+
+    O delete_all_cookies do WebDriver só alcança o domínio do documento atual (em
+    about:blank, nenhum); o cache HTTP em disco é mantido para o próximo uso do driver.
+    """
+    driver.get("about:blank")
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+
+def capture_png(driver: Any, element: Any = None) -> bytes:
+    """
+    Captura a página (ou só a área do elemento) via CDP Page.captureScreenshot
+
+    Evita o envelope JSON do protocolo WebDriver; optimizeForSpeed pula a busca de
+    filtros PNG do Chrome, já que a compressão pesada é feita depois pelo otimizador.
+    """
+    params = {"format": "png", "optimizeForSpeed": True}
+    if element is not None:
+        rect = element.rect
+        params["captureBeyondViewport"] = True
+        params["clip"] = {
+            "x": rect["x"],
+            "y": rect["y"],
+            "width": rect["width"],
+            "height": rect["height"],
+            "scale": 1
+        }
+    return base64.b64decode(driver.execute_cdp_cmd("Page.captureScreenshot", params)["data"])
+
+# Último viewport aplicado em cada driver (o override vale para as navegações seguintes)
+_current_viewports: "weakref.WeakKeyDictionary[Any, tuple]" = weakref.WeakKeyDictionary()
+_current_viewports_lock = threading.Lock()
+
+def set_device_metrics(driver: Any, width: int, height: int, mobile: bool = False):
+    """
+    Define o viewport via CDP (Emulation.setDeviceMetricsOverride)
+
+    Em headless o set_window_size não garante o tamanho do viewport; com o override
+    o Chrome já renderiza na resolução final e o screenshot não precisa ser reduzido.
+    Se o driver já está com esse viewport, a chamada CDP é pulada.
+    """
+    viewport = (width, height, mobile)
+    with _current_viewports_lock:
+        if _current_viewports.get(driver) == viewport:
+            return
+
+    driver.execute_cdp_cmd("Emulation.setDeviceMetricsOverride", {
+        "width": width,
+        "height": height,
+        "deviceScaleFactor": 1,
+        "mobile": mobile
+    })
+    with _current_viewports_lock:
+        _current_viewports[driver] = viewport
+
+class ChromeDriverPool:
+    """
+    Mantém até `size` drivers criados sob demanda pela `driver_factory`
+
+    Cada driver é usado por uma captura por vez: quem chama `driver()` recebe um
+    driver livre (ou cria um novo se o limite não foi atingido) e o devolve ao sair.
+    É seguro para uso a partir de várias threads.
+
+    Com `cache_name`, cada driver ocupa uma vaga numerada e recebe na `driver_factory`
+    o diretório de cache em disco da vaga. O processo trava a vaga até `close()`, então
+    drivers recriados e reinícios do serviço reaproveitam o cache já aquecido; vagas
+    travadas por outro processo vivo são puladas.
+    """
+
+    def __init__(self, driver_factory: Callable[[Optional[str]], Any], size: int, cache_name: Optional[str] = None):
+        self._driver_factory = driver_factory
+        self._max_size = max(1, size)
+        self.size = self._max_size
+        self._cache_name = cache_name
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._drivers: List[Any] = []
+        # Vaga -> driver (None enquanto o driver da vaga está sendo criado)
+        self._slots: Dict[int, Any] = {}
+        # Vaga -> lock do diretório de cache (mantido enquanto o pool existir)
+        self._slot_locks: Dict[int, IO] = {}
+        self._creating = 0
+        self._started = 0
+        self._lock = threading.Lock()
+        self.setup_error: Optional[Exception] = None
+
+        if cache_name:
+            try:
+                _prune_stale_disk_caches(cache_name)
+            except OSError as e:
+                logger.warning(f"⚠️ Falha ao limpar caches antigos do Chrome: {e}")
+
+    @property
+    def failed_to_start(self) -> bool:
+        """True se nenhum driver pôde ser criado"""
+        with self._lock:
+            return self.setup_error is not None and not self._started
+
+    def _acquire(self) -> Any:
+        """Obtém um driver livre, criando um novo enquanto houver vaga no pool"""
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                if self.setup_error is not None and not self._started and not self._creating:
+                    # O Chrome não sobe neste ambiente: não insiste a cada captura
+                    raise self.setup_error
+                can_create = len(self._drivers) + self._creating < self.size
+                if can_create:
+                    self._creating += 1
+                    slot = self._claim_slot()
+                    self._slots[slot] = None
+
+            if can_create:
+                cache_dir = self._cache_dir(slot)
+                try:
+                    driver = self._driver_factory(cache_dir)
+                except Exception as e:
+                    with self._lock:
+                        self._creating -= 1
+                        del self._slots[slot]
+                        self.setup_error = e
+                        others_available = self._started or self._creating
+                        if others_available:
+                            # Abre mão da vaga que falhou em vez de tentar de novo a cada captura
+                            self.size -= 1
+                    if not others_available:
+                        raise
+                    # Outros drivers já existem: espera um deles em vez de falhar a captura
+                    logger.warning(f"⚠️ Driver extra do pool não iniciou: {e}")
+                    continue
+                with self._lock:
+                    self._creating -= 1
+                    self._started += 1
+                    self._drivers.append(driver)
+                    self._slots[slot] = driver
+                return driver
+
+            # Pool cheio: espera um driver ser devolvido (revalida periodicamente
+            # caso uma criação em andamento falhe e libere a vaga)
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def _claim_slot(self) -> int:
+        """Escolhe a menor vaga livre cujo cache este processo trava (chamar com o lock)"""
+        for slot in itertools.count():
+            if slot in self._slots:
+                continue
+            if not self._cache_name or slot in self._slot_locks:
+                return slot
+            cache_dir = disk_cache_dir(self._cache_name, slot)
+            try:
+                lock = _lock_cache_dir(cache_dir)
+            except OSError as e:
+                # Diretório temporário inacessível: segue sem cache em disco próprio
+                logger.warning(f"⚠️ Cache em disco do Chrome indisponível: {e}")
+                self._cache_name = None
+                return slot
+            if lock is not None:
+                os.utime(lock.name)
+                self._slot_locks[slot] = lock
+                return slot
+            # Cache em uso por outro processo vivo: tenta a próxima vaga
+
+    def _cache_dir(self, slot: int) -> Optional[str]:
+        """Diretório de cache em disco da vaga (None se o pool não usa cache próprio)"""
+        if not self._cache_name or slot not in self._slot_locks:
+            return None
+        return disk_cache_dir(self._cache_name, slot)
+
+    def _release_slot(self, driver: Any):
+        """Libera a vaga do driver para o próximo driver criado, mantendo o cache travado (chamar com o lock)"""
+        for slot, slot_driver in self._slots.items():
+            if slot_driver is driver:
+                del self._slots[slot]
+                return
+
+    @contextmanager
+    def driver(self) -> Iterator[Any]:
+        """Empresta um driver do pool durante o bloco"""
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            self._idle.put(driver)
+
+    def reset(self, reset_driver: Callable[[Any], None]):
+        """
+        Prepara os drivers ociosos para o próximo lote, mantendo os processos Chrome vivos
+
+        Drivers cuja preparação falhar (ex.: Chrome encerrado) são descartados; vagas
+        perdidas e falhas de inicialização são esquecidas para o próximo lote tentar de novo.
+        """
+        idle = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        for driver in idle:
+            try:
+                reset_driver(driver)
+            except Exception as e:
+                logger.warning(f"⚠️ Driver do pool descartado: {e}")
+                with self._lock:
+                    if driver in self._drivers:
+                        self._drivers.remove(driver)
+                    self._release_slot(driver)
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                continue
+            self._idle.put(driver)
+
+        with self._lock:
+            self.size = self._max_size
+            self._started = len(self._drivers)
+            self.setup_error = None
+
+    def close(self):
+        """Encerra todos os drivers criados pelo pool"""
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+            for driver in drivers:
+                self._release_slot(driver)
+        self._idle = queue.LifoQueue()
+
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.error(f"❌ Erro ao fechar driver do pool: {e}")
+
+        # Os Chromes já saíram: destrava os caches (mantidos em disco para o próximo processo)
+        with self._lock:
+            slot_locks, self._slot_locks = self._slot_locks, {}
+        for lock in slot_locks.values():
+            lock.close()
+
+        if drivers:
+            logger.info(f"✅ {len(drivers)} Chrome driver(s) do pool fechados")
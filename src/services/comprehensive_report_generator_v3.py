@@ -309,8 +309,8 @@ Todos os dados coletados estão preservados e disponíveis para análise:
                 logger.warning(f"⚠️ Diretório de arquivos não existe: {files_dir}")
                 return screenshot_paths
             
-            # Busca por arquivos PNG (screenshots)
-            for screenshot_file in files_dir.glob("*.png"):
+            # Busca por screenshots (PNG ou JPEG para capturas fotográficas)
+            for screenshot_file in [*files_dir.glob("*.png"), *files_dir.glob("*.jpg")]:
                 relative_path = f"files/{files_dir.name}/{screenshot_file.name}"
                 screenshot_paths.append(relative_path)
                 logger.debug(f"📸 Screenshot encontrado: {screenshot_file.name}")
@@ -9,8 +9,9 @@ import os
 import logging
 import time
 import requests
+from collections import OrderedDict
 from typing import Optional, Dict, Any
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlsplit, urlunsplit
 from bs4 import BeautifulSoup
 import re
 import hashlib # Import hashlib for caching
@@ -41,6 +42,7 @@ class ContentExtractor:
 
         self.min_content_length = 100
         self.max_retries = 3
+        self.connect_timeout = 5
         self.jina_api_key = os.getenv('JINA_API_KEY')
         self.jina_reader_url = "https://r.jina.ai/"
 
@@ -57,20 +59,22 @@ class ContentExtractor:
             'Upgrade-Insecure-Requests': '1'
         }
 
-        # Cache configuration (simplistic in-memory cache for example)
-        self._cache = {}
-        self._cache_max_size = 100
+        # Cache LRU em memória, compartilhado por todos os usuários da instância global
+        self._cache = OrderedDict()
+        self._cache_max_size = 4096
 
         logger.info("Content Extractor inicializado com múltiplas estratégias")
 
 
-    def extract_content(self, url: str, timeout: int = 30) -> Dict[str, Any]:
+    def extract_content(self, url: str, timeout: Optional[int] = None) -> Dict[str, Any]:
         """
         Extrai conteúdo de uma URL usando múltiplas estratégias com fallback
 
         Args:
             url: URL para extrair conteúdo
-            timeout: Timeout em segundos
+            timeout: Timeout de leitura em segundos de cada requisição HTTP
+                (a conexão usa self.connect_timeout); sem ele, cada estratégia
+                mantém o próprio timeout padrão
 
         Returns:
             dict: Conteúdo extraído com metadados
@@ -82,6 +86,7 @@ class ContentExtractor:
             return self._create_error_result("URL inválida ou vazia")
 
         start_time = time.time()
+        request_timeout = (min(self.connect_timeout, timeout), timeout) if timeout is not None else None
 
         # Sanitiza URL
         clean_url = self._sanitize_url(url)
@@ -99,7 +104,7 @@ class ContentExtractor:
             logger.warning(f"⚠️ MCP {social_platform} falhou, continuando com estratégias normais")
 
         # Verifica cache primeiro
-        cache_key = hashlib.md5(clean_url.encode()).hexdigest()
+        cache_key = hashlib.md5(self._normalize_cache_url(clean_url).encode()).hexdigest()
         cached_result = self._get_cached_result(cache_key)
         if cached_result:
             logger.info(f"✅ Conteúdo encontrado no cache para {clean_url}")
@@ -109,13 +114,13 @@ class ContentExtractor:
         # Detecta se é URL do YouTube e usa estratégias específicas
         if self.youtube_pattern.search(clean_url):
             logger.info(f"▶️ URL do YouTube detectada: {clean_url}")
-            content = self._extract_youtube_content(clean_url, self.max_retries)
+            content = self._extract_youtube_content(clean_url, self.max_retries, request_timeout)
         else:
             # Para URLs normais, usa estratégias padrão
-            content = self._extract_regular_content(clean_url, self.max_retries)
+            content = self._extract_regular_content(clean_url, self.max_retries, request_timeout)
 
         if content:
-            metadata = self.extract_metadata(clean_url)
+            metadata = self.extract_metadata(clean_url, **self._timeout_kwargs(request_timeout))
             result = {
                 'url': clean_url,
                 'content': content,
@@ -130,7 +135,12 @@ class ContentExtractor:
             return self._create_error_result("Falha ao extrair conteúdo após todas as tentativas", time.time() - start_time)
 
 
-    def _extract_youtube_content(self, url: str, max_retries: int) -> Optional[str]:
+    @staticmethod
+    def _timeout_kwargs(timeout: Any) -> Dict[str, Any]:
+        """Repassa o timeout só quando informado, preservando o padrão de cada estratégia"""
+        return {} if timeout is None else {'timeout': timeout}
+
+    def _extract_youtube_content(self, url: str, max_retries: int, timeout: Any = None) -> Optional[str]:
         """Extração especializada para conteúdo do YouTube"""
         logger.info(f"▶️ Processando URL do YouTube com estratégias especializadas")
 
@@ -139,7 +149,7 @@ class ContentExtractor:
                 try:
                     logger.info(f"🎯 YouTube - Tentativa {attempt + 1}/{max_retries} - Estratégia: {strategy_name}")
 
-                    content = strategy_func(url)
+                    content = strategy_func(url, **self._timeout_kwargs(timeout))
 
                     if content and len(content.strip()) >= self.min_content_length:
                         logger.info(f"✅ Conteúdo YouTube extraído com sucesso usando {strategy_name}")
@@ -159,7 +169,7 @@ class ContentExtractor:
         logger.error(f"❌ Todas as estratégias YouTube falharam para {url}")
         return None
 
-    def _extract_regular_content(self, url: str, max_retries: int) -> Optional[str]:
+    def _extract_regular_content(self, url: str, max_retries: int, timeout: Any = None) -> Optional[str]:
         """Extração padrão para URLs normais"""
 
         for attempt in range(max_retries):
@@ -167,7 +177,7 @@ class ContentExtractor:
                 try:
                     logger.info(f"🎯 Tentativa {attempt + 1}/{max_retries} - Estratégia: {strategy_name}")
 
-                    content = strategy_func(url)
+                    content = strategy_func(url, **self._timeout_kwargs(timeout))
 
                     if content and len(content.strip()) >= self.min_content_length:
                         logger.info(f"✅ Conteúdo extraído com sucesso usando {strategy_name}")
@@ -220,13 +230,13 @@ class ContentExtractor:
         except Exception as e:
             raise e
 
-    def _extract_direct(self, url: str) -> Optional[str]:
+    def _extract_direct(self, url: str, timeout: Any = 20) -> Optional[str]:
         """Extração direta usando BeautifulSoup"""
         try:
             response = requests.get(
                 url,
                 headers=self.headers,
-                timeout=20,
+                timeout=timeout,
                 allow_redirects=True
             )
 
@@ -265,13 +275,13 @@ class ContentExtractor:
         except Exception as e:
             raise e
 
-    def _extract_with_readability(self, url: str) -> Optional[str]:
+    def _extract_with_readability(self, url: str, timeout: Any = 20) -> Optional[str]:
         """Extração usando algoritmo de readability"""
         try:
             response = requests.get(
                 url,
                 headers=self.headers,
-                timeout=20,
+                timeout=timeout,
                 allow_redirects=True
             )
 
@@ -312,13 +322,13 @@ class ContentExtractor:
         except Exception as e:
             raise e
 
-    def _extract_fallback(self, url: str) -> Optional[str]:
+    def _extract_fallback(self, url: str, timeout: Any = 15) -> Optional[str]:
         """Extração de fallback mais agressiva"""
         try:
             response = requests.get(
                 url,
                 headers=self.headers,
-                timeout=15,
+                timeout=timeout,
                 allow_redirects=True
             )
 
@@ -346,7 +356,7 @@ class ContentExtractor:
         except Exception as e:
             raise e
 
-    def _youtube_api_extraction(self, url: str) -> Optional[str]:
+    def _youtube_api_extraction(self, url: str, timeout: Any = 10) -> Optional[str]:
         """Extração usando API do YouTube"""
         try:
             # Verifica se a API key está disponível
@@ -369,7 +379,7 @@ class ContentExtractor:
                 'key': youtube_api_key
             }
 
-            response = requests.get(api_url, params=params, timeout=10)
+            response = requests.get(api_url, params=params, timeout=timeout)
             response.raise_for_status()
 
             data = response.json()
@@ -409,14 +419,14 @@ URL: {url}
             logger.error(f"Erro na extração YouTube API: {str(e)}")
             return None
 
-    def _youtube_html_extraction(self, url: str) -> Optional[str]:
+    def _youtube_html_extraction(self, url: str, timeout: Any = 15) -> Optional[str]:
         """Extração de conteúdo básico do HTML do YouTube"""
         try:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
 
-            response = requests.get(url, headers=headers, timeout=15)
+            response = requests.get(url, headers=headers, timeout=timeout)
             response.raise_for_status()
 
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -458,7 +468,7 @@ CONTEXTO: {script_content[:500] if script_content else 'Contexto adicional não
             logger.error(f"Erro na extração YouTube HTML: {str(e)}")
             return None
 
-    def _youtube_fallback_extraction(self, url: str) -> Optional[str]:
+    def _youtube_fallback_extraction(self, url: str, timeout: Any = None) -> Optional[str]:
         """Extração de fallback para YouTube - informações mínimas"""
         try:
             video_id = self._extract_youtube_video_id(url)
@@ -532,13 +542,13 @@ STATUS: Fallback de emergência ativado
 
         return cleaned_text.strip()
 
-    def extract_metadata(self, url: str) -> Dict[str, Any]:
+    def extract_metadata(self, url: str, timeout: Any = 15) -> Dict[str, Any]:
         """Extrai metadatos da página"""
         try:
             response = requests.get(
                 url,
                 headers=self.headers,
-                timeout=15,
+                timeout=timeout,
                 allow_redirects=True
             )
 
@@ -662,6 +672,14 @@ STATUS: Fallback de emergência ativado
         except Exception:
             return url # Return original if parsing fails
 
+    def _normalize_cache_url(self, url: str) -> str:
+        """Normaliza a URL para chave de cache (esquema/host em minúsculas, sem barra final)."""
+        try:
+            parts = urlsplit(url)
+            return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ''))
+        except ValueError:
+            return url
+
     def _identify_social_platform(self, url: str) -> Optional[str]:
         """Identifica a plataforma de rede social a partir da URL."""
         if 'twitter.com' in url or 'x.com' in url:
@@ -714,15 +732,19 @@ STATUS: Fallback de emergência ativado
 
     def _get_cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Busca resultado do cache."""
+        try:
+            self._cache.move_to_end(cache_key)
+        except KeyError:
+            return None
         return self._cache.get(cache_key)
 
     def _cache_result(self, cache_key: str, result: Dict[str, Any]):
         """Armazena resultado no cache."""
-        if len(self._cache) >= self._cache_max_size:
-            # Simple eviction: remove the oldest item (not truly LRU but a basic approach)
-            oldest_key = next(iter(self._cache))
-            del self._cache[oldest_key]
         self._cache[cache_key] = result
+        self._cache.move_to_end(cache_key)
+        if len(self._cache) > self._cache_max_size:
+            # Remove o item usado há mais tempo
+            self._cache.popitem(last=False)
 
     def _create_error_result(self, message: str, processing_time: Optional[float] = None) -> Dict[str, Any]:
         """Cria um dicionário de erro padrão."""
@@ -474,7 +474,7 @@ Todos os dados coletados foram preservados e estão disponíveis para análise m
             screenshots_data = []
             files_dir = Path(f"analyses_data/files/{session_id}")
             if files_dir.exists():
-                for screenshot_file in files_dir.glob("*.png"):
+                for screenshot_file in [*files_dir.glob("*.png"), *files_dir.glob("*.jpg")]:
                     screenshots_data.append({
                         'filename': screenshot_file.name,
                         'path': str(screenshot_file),
@@ -6,34 +6,224 @@ Coletor que gera arquivo .md gigante com TODAS as informações para estudo da I
 """
 
 import os
+import gzip
+import json
 import logging
 import time
 import asyncio
-from typing import Dict, List, Any, Optional
+import aiofiles
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
+from string import Template
 
-# Importa serviços necessários
-from services.search_api_manager import search_api_manager
-from services.social_media_extractor import social_media_extractor
-from services.trendfinder_client import trendfinder_client
-from services.visual_content_capture import visual_content_capture
+# Os serviços de busca/captura são importados sob demanda em cada etapa:
+# carregá-los puxa selenium, clientes HTTP e de IA, que só são necessários na coleta
 
 logger = logging.getLogger(__name__)
 
+def _serialize_context(context: Any) -> str:
+    """Serializa o contexto para o relatório; chaves não-str ou referências circulares caem no repr"""
+    try:
+        return json.dumps(context, ensure_ascii=False, indent=2, default=str)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"⚠️ Contexto não serializável em JSON, usando repr: {e}")
+        return repr(context)
+
+def _format_youtube_post(i: int, post: Dict[str, Any]) -> str:
+    """Formata um vídeo do YouTube para o relatório"""
+    g = post.get
+    return (
+        f"**{i}. {g('title', 'Sem título')}**\n"
+        f"Canal: {g('channel', 'N/A')}\n"
+        f"Views: {g('view_count', 'N/A')}\n"
+        f"Likes: {g('like_count', 'N/A')}\n"
+        f"URL: {g('url', 'N/A')}\n"
+        f"Descrição: {g('description', 'N/A')[:200]}...\n\n"
+    )
+
+def _format_twitter_post(i: int, post: Dict[str, Any]) -> str:
+    """Formata um tweet para o relatório"""
+    g = post.get
+    return (
+        f"**{i}. Tweet de {g('author', 'N/A')}**\n"
+        f"Texto: {g('text', 'N/A')[:300]}...\n"
+        f"Likes: {g('like_count', 'N/A')}\n"
+        f"Retweets: {g('retweet_count', 'N/A')}\n"
+        f"URL: {g('url', 'N/A')}\n\n"
+    )
+
+def _format_instagram_post(i: int, post: Dict[str, Any]) -> str:
+    """Formata um post do Instagram para o relatório"""
+    g = post.get
+    return (
+        f"**{i}. Post de {g('username', 'N/A')}**\n"
+        f"Caption: {g('caption', 'N/A')[:300]}...\n"
+        f"Likes: {g('like_count', 'N/A')}\n"
+        f"Comments: {g('comment_count', 'N/A')}\n"
+        f"URL: {g('url', 'N/A')}\n\n"
+    )
+
+def _format_linkedin_post(i: int, post: Dict[str, Any]) -> str:
+    """Formata um post do LinkedIn para o relatório"""
+    g = post.get
+    return (
+        f"**{i}. {g('title', 'Sem título')}**\n"
+        f"Autor: {g('author', 'N/A')}\n"
+        f"Empresa: {g('company', 'N/A')}\n"
+        f"Conteúdo: {g('content', 'N/A')[:300]}...\n"
+        f"Likes: {g('likes', 'N/A')}\n"
+        f"URL: {g('url', 'N/A')}\n\n"
+    )
+
+def _stage_failure(stage_results: Dict[str, Any]) -> Optional[str]:
+    """Retorna a mensagem de erro de uma etapa que falhou, ou None se a etapa produziu dados"""
+    if stage_results.get('success') is False or 'critical_error' in stage_results:
+        return stage_results.get('error') or stage_results.get('critical_error') or 'sem detalhes'
+    return None
+
+def _web_result_urls(web_results: Dict[str, Any]) -> List[Any]:
+    """
+    URLs únicas da busca web, na ordem em que apareceram
+
+    Usa consolidated_urls quando presente; o payload do SearchAPIManager só traz
+    api_results/websailor_results, então as URLs saem dos provedores e das páginas do WebSailor.
+    """
+    if web_results.get('consolidated_urls'):
+        urls = web_results['consolidated_urls']
+    else:
+        urls = []
+        for provider_result in web_results.get('api_results', {}).values():
+            for item in provider_result.get('results', ()):
+                if isinstance(item, dict):
+                    urls.append(item.get('url') or item.get('link'))
+        websailor_sources = web_results.get('websailor_results', {}).get('conteudo_consolidado', {}).get('fontes_detalhadas', ())
+        urls.extend(source.get('url') for source in websailor_sources)
+    # Provedores costumam devolver URLs repetidas: remove duplicatas preservando a ordem
+    return list(dict.fromkeys(url for url in urls if url))
+
+def _web_provider_results(web_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Resultado de cada provedor: all_results quando presente, senão os valores de api_results"""
+    return web_results.get('all_results') or list(web_results.get('api_results', {}).values())
+
+def _web_providers(web_results: Dict[str, Any]) -> List[str]:
+    """Provedores consultados: providers_used quando presente, senão as chaves de api_results"""
+    return web_results.get('providers_used') or list(web_results.get('api_results', {}))
+
+def _format_percentage(value: Optional[float]) -> str:
+    """Percentual com uma casa decimal, ou N/A quando não há base para calcular"""
+    return "N/A" if value is None else f"{value:.1f}%"
+
+def _format_stage_failure(error: str) -> str:
+    """Linha do relatório para uma etapa que falhou"""
+    return f"\n**⚠️ Etapa FALHOU:** {error}\n"
+
+# Formatadores por plataforma, na ordem em que aparecem no relatório
+_PLATFORM_FORMATTERS: Dict[str, Callable[[int, Dict[str, Any]], str]] = {
+    'youtube': _format_youtube_post,
+    'twitter': _format_twitter_post,
+    'instagram': _format_instagram_post,
+    'linkedin': _format_linkedin_post,
+}
+
+# Trechos fixos do relatório, compilados uma vez na importação do módulo
+_MD_HEADER_TEMPLATE = Template("""# RELATÓRIO DE COLETA MASSIVA - ETAPA 1
+## Sessão: $session_id
+## Query: $query
+## Data: $generated_at
+
+---
+
+## 1. CONTEXTO DO PROJETO
+
+**Query de Busca:** $query
+
+**Contexto Fornecido:**
+```json
+$context_json
+```
+
+**Objetivo:** Coleta massiva de dados reais para análise aprofundada de mercado e geração de insights estratégicos.
+
+---
+
+## 2. RESULTADOS DA BUSCA WEB INTERCALADA
+
+### 2.1 Estatísticas Gerais
+""")
+
+_MD_STATISTICS_TEMPLATE = Template("""
+
+---
+
+## 6. ESTATÍSTICAS FINAIS DA COLETA
+
+### 6.1 Resumo Quantitativo
+- **Total de Fontes Web:** $total_web_sources
+- **Total de Posts Sociais:** $total_social_posts
+- **Total de Tendências:** $total_trends
+- **Total de Screenshots:** $total_screenshots
+- **Tempo de Execução:** $execution_time segundos
+
+### 6.2 Qualidade dos Dados
+- **URLs Válidas:** $valid_urls_percentage
+- **Conteúdo Extraído:** $content_extraction_success
+- **Screenshots Bem-sucedidos:** $screenshot_success_rate
+
+### 6.3 Distribuição por Fonte
+""")
+
+_MD_CONCLUSION_TEMPLATE = Template("""
+
+---
+
+## 7. CONCLUSÕES DA COLETA MASSIVA
+
+### 7.1 Dados Coletados
+Este relatório contém **$total_data_points pontos de dados** coletados de múltiplas fontes em tempo real, incluindo:
+
+1. **Busca Web Intercalada:** Dados de $providers_count provedores diferentes
+2. **Redes Sociais:** Posts de $platforms_count plataformas
+3. **Análise de Tendências:** Identificação de padrões virais e hashtags em alta
+4. **Evidências Visuais:** Screenshots dos posts com maior engajamento
+
+### 7.2 Preparação para Etapa 2
+Este documento serve como base completa para a **Etapa 2 - Análise e Síntese da IA**, onde:
+
+1. A IA irá **estudar ativamente** todo este conteúdo por **5 minutos**
+2. Realizará **buscas adicionais** conforme necessário
+3. Sintetizará os achados em um **JSON estruturado**
+4. Preparará dados para geração dos **16 módulos de análise**
+
+### 7.3 Próximos Passos
+- [x] Coleta massiva de dados concluída
+- [ ] Análise e síntese da IA (Etapa 2)
+- [ ] Geração dos 16 módulos (Etapa 3)
+- [ ] Compilação do relatório final
+
+---
+
+**Arquivo gerado em:** $generated_at
+**Sessão:** $session_id
+**Sistema:** ARQV30 Enhanced v3.0 - Massive Data Collector
+""")
+
 class MassiveDataCollector:
     """Coletor de dados massivos que gera .md gigante para estudo da IA"""
 
     def __init__(self):
         """Inicializa o coletor massivo"""
         self.base_dir = "analyses_data"
+        # Relatório comprimido (.md.gz) é opcional: os leitores da Etapa 2 abrem relatorio_coleta.md em texto puro
+        self.compress_report = os.getenv('MASSIVE_REPORT_GZIP', 'false').lower() == 'true'
         self.ensure_base_directories()
         logger.info("🌊 Massive Data Collector CORRIGIDO inicializado")
 
     def ensure_base_directories(self):
         """Garante que os diretórios base existem"""
-        Path(self.base_dir).mkdir(exist_ok=True)
-        Path(f"{self.base_dir}/files").mkdir(exist_ok=True)
+        # Cria base_dir e base_dir/files com uma única chamada
+        os.makedirs(os.path.join(self.base_dir, "files"), exist_ok=True)
 
     async def execute_massive_collection(
         self, 
@@ -53,34 +243,40 @@ class MassiveDataCollector:
         logger.info(f"🌊 INICIANDO COLETA MASSIVA para: {query}")
         start_time = time.time()
         
+        # Serializa o contexto uma vez: o relatório usa o texto pronto e o resultado não guarda o dict do chamador
+        context_json = _serialize_context(context)
+        
         # Estrutura de resultados
         massive_results = {
             'session_id': session_id,
             'query': query,
-            'context': context,
+            'context_json': context_json,
             'start_time': datetime.now().isoformat(),
             'web_search_results': {},
             'social_media_results': {},
             'trendfinder_results': {},
             'viral_posts_screenshots': {},
             'statistics': {},
-            'giant_md_path': None
+            'giant_md_path': None,
+            'giant_md_size': 0
         }
         
         try:
-            # 1. BUSCA WEB INTERCALADA
-            logger.info("🔍 Executando busca web intercalada...")
-            web_results = await self._execute_interleaved_web_search(query)
+            # 1-3. BUSCA WEB INTERCALADA, REDES SOCIAIS E TRENDFINDER EM PARALELO
+            # As três etapas são independentes; só os screenshots dependem das redes sociais
+            logger.info("🔍📱📈 Executando busca web, redes sociais e TrendFinder em paralelo...")
+            async with self._shared_http_session():
+                web_results, social_results, trend_results = await asyncio.gather(
+                    self._execute_interleaved_web_search(query),
+                    self._execute_social_media_search(query, context, session_id),
+                    self._execute_trendfinder_search(query),
+                    return_exceptions=True
+                )
+            web_results = self._stage_result_or_error(web_results, 'busca web intercalada', query)
+            social_results = self._stage_result_or_error(social_results, 'busca de redes sociais', query)
+            trend_results = self._stage_result_or_error(trend_results, 'TrendFinder', query)
             massive_results['web_search_results'] = web_results
-            
-            # 2. BUSCA EM REDES SOCIAIS
-            logger.info("📱 Executando busca em redes sociais...")
-            social_results = await self._execute_social_media_search(query, context, session_id)
             massive_results['social_media_results'] = social_results
-            
-            # 3. BUSCA COM TRENDFINDER
-            logger.info("📈 Executando busca com TrendFinder...")
-            trend_results = await self._execute_trendfinder_search(query)
             massive_results['trendfinder_results'] = trend_results
             
             # 4. CAPTURA DE SCREENSHOTS DOS POSTS VIRAIS
@@ -88,14 +284,18 @@ class MassiveDataCollector:
             screenshots_results = await self._capture_viral_screenshots(social_results, session_id)
             massive_results['viral_posts_screenshots'] = screenshots_results
             
-            # 5. GERA ARQUIVO .MD GIGANTE
+            # 5. GERA ARQUIVO .MD GIGANTE (e as estatísticas, na mesma passagem pelos resultados)
             logger.info("📄 Gerando arquivo .md GIGANTE para estudo da IA...")
-            giant_md_path = await self._generate_giant_markdown_report(massive_results, session_id)
+            giant_md_path = await self._generate_giant_markdown_report(massive_results, session_id, start_time)
             massive_results['giant_md_path'] = giant_md_path
             
-            # 6. CALCULA ESTATÍSTICAS
+            # 6. FINALIZA ESTATÍSTICAS
             execution_time = time.time() - start_time
-            massive_results['statistics'] = self._calculate_collection_statistics(massive_results, execution_time)
+            statistics = massive_results['statistics'] or self._calculate_collection_statistics(
+                self._count_collected_data(massive_results), execution_time
+            )
+            statistics['execution_time'] = execution_time
+            massive_results['statistics'] = statistics
             massive_results['end_time'] = datetime.now().isoformat()
             
             logger.info(f"✅ COLETA MASSIVA CONCLUÍDA em {execution_time:.2f}s")
@@ -109,9 +309,51 @@ class MassiveDataCollector:
             massive_results['success'] = False
             return massive_results
 
+    @asynccontextmanager
+    async def _shared_http_session(self):
+        """
+        Abre uma sessão aiohttp compartilhada pelos provedores durante a coleta
+        
+        A sessão fica vinculada ao event loop da coleta (as rotas criam um loop
+        por requisição), por isso vive apenas durante execute_massive_collection.
+        """
+        try:
+            import aiohttp
+            from services.search_api_manager import shared_http_session
+        except ImportError as e:
+            # Sem a sessão compartilhada cada provedor abre a própria sessão
+            logger.warning(f"⚠️ Sessão HTTP compartilhada indisponível: {e}")
+            shared_http_session = None
+        
+        if shared_http_session is None or shared_http_session.get() is not None:
+            # Sessão indisponível ou já aberta por um chamador externo
+            yield
+            return
+        
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=16, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            token = shared_http_session.set(session)
+            try:
+                yield
+            finally:
+                shared_http_session.reset(token)
+
+    def _stage_result_or_error(self, result: Any, stage_name: str, query: str) -> Dict[str, Any]:
+        """Converte exceção de uma etapa paralela no mesmo dicionário de erro usado pelas etapas"""
+        if isinstance(result, BaseException):
+            logger.error(f"❌ Erro na {stage_name}: {result}")
+            return {
+                'success': False,
+                'error': str(result),
+                'query': query
+            }
+        return result
+
     async def _execute_interleaved_web_search(self, query: str) -> Dict[str, Any]:
         """Executa busca web intercalada com múltiplos provedores"""
         try:
+            from services.search_api_manager import search_api_manager
+
             # Usa o SearchAPIManager para busca intercalada
             search_results = await search_api_manager.interleaved_search(query)
             
@@ -129,8 +371,12 @@ class MassiveDataCollector:
     async def _execute_social_media_search(self, query: str, context: Dict[str, Any], session_id: str) -> Dict[str, Any]:
         """Executa busca abrangente em redes sociais"""
         try:
-            # Usa o SocialMediaExtractor
-            social_results = social_media_extractor.extract_comprehensive_data(query, context, session_id)
+            from services.social_media_extractor import social_media_extractor
+
+            # Usa o SocialMediaExtractor (síncrono) em thread para não bloquear o event loop
+            social_results = await asyncio.to_thread(
+                social_media_extractor.extract_comprehensive_data, query, context, session_id
+            )
             
             logger.info(f"✅ Busca redes sociais: {social_results.get('total_posts', 0)} posts encontrados")
             return social_results
@@ -146,6 +392,8 @@ class MassiveDataCollector:
     async def _execute_trendfinder_search(self, query: str) -> Dict[str, Any]:
         """Executa busca com TrendFinder MCP"""
         try:
+            from services.trendfinder_client import trendfinder_client
+
             # Usa o TrendFinderClient
             trend_results = await trendfinder_client.search(query)
             
@@ -163,6 +411,9 @@ class MassiveDataCollector:
     async def _capture_viral_screenshots(self, social_results: Dict[str, Any], session_id: str) -> Dict[str, Any]:
         """Captura screenshots dos posts com maior engajamento"""
         try:
+            from services.visual_content_capture import get_visual_content_capture
+            visual_content_capture = get_visual_content_capture()
+
             # Usa o VisualContentCapture para capturar posts virais
             screenshots_results = await visual_content_capture.capture_viral_posts_screenshots(
                 social_results, session_id
@@ -179,26 +430,30 @@ class MassiveDataCollector:
                 'session_id': session_id
             }
 
-    async def _generate_giant_markdown_report(self, massive_results: Dict[str, Any], session_id: str) -> str:
+    async def _generate_giant_markdown_report(self, massive_results: Dict[str, Any], session_id: str, start_time: float) -> str:
         """
         Gera arquivo .md GIGANTE com TODAS as informações coletadas
         Este arquivo será usado pela IA para "estudar" na Etapa 2
+        As estatísticas da coleta são calculadas durante a geração e gravadas em massive_results
         """
         try:
             session_dir = Path(self.base_dir) / session_id
-            session_dir.mkdir(exist_ok=True)
+            await asyncio.to_thread(os.makedirs, session_dir, exist_ok=True)
             
-            md_path = session_dir / "relatorio_coleta.md"
-            
-            # Constrói o conteúdo do markdown gigante
-            md_content = self._build_giant_markdown_content(massive_results)
-            
-            # Salva o arquivo
-            with open(md_path, 'w', encoding='utf-8') as f:
-                f.write(md_content)
+            # Escreve o markdown seção a seção, sem manter o relatório inteiro em memória
+            if self.compress_report:
+                md_path = session_dir / "relatorio_coleta.md.gz"
+                await self._write_gzip_report(md_path, massive_results, start_time)
+            else:
+                md_path = session_dir / "relatorio_coleta.md"
+                async with aiofiles.open(md_path, 'w', encoding='utf-8') as f:
+                    async for section in self._iter_markdown_sections(massive_results, start_time):
+                        await f.write(section)
             
             # Verifica tamanho do arquivo
-            file_size_mb = md_path.stat().st_size / (1024 * 1024)
+            file_stat = await asyncio.to_thread(md_path.stat)
+            massive_results['giant_md_size'] = file_stat.st_size
+            file_size_mb = file_stat.st_size / (1024 * 1024)
             logger.info(f"📄 Arquivo .md gigante criado: {file_size_mb:.2f}MB")
             
             return str(md_path)
@@ -207,156 +462,176 @@ class MassiveDataCollector:
             logger.error(f"❌ Erro ao gerar .md gigante: {e}")
             return None
 
-    def _build_giant_markdown_content(self, massive_results: Dict[str, Any]) -> str:
-        """Constrói o conteúdo completo do markdown gigante"""
-        
+    async def _write_gzip_report(self, gz_path: Path, massive_results: Dict[str, Any], start_time: float):
+        """Grava o relatório comprimido com gzip nível 1 (rápido), seção a seção fora do event loop"""
+        gz_file = await asyncio.to_thread(gzip.open, gz_path, 'wt', encoding='utf-8', compresslevel=1)
+        try:
+            async for section in self._iter_markdown_sections(massive_results, start_time):
+                await asyncio.to_thread(gz_file.write, section)
+        finally:
+            await asyncio.to_thread(gz_file.close)
+
+    async def _iter_markdown_sections(self, massive_results: Dict[str, Any], start_time: float) -> AsyncIterator[str]:
+        """Gera o conteúdo do markdown gigante uma seção por vez"""
         session_id = massive_results['session_id']
-        query = massive_results['query']
-        context = massive_results['context']
+        web_results = massive_results.get('web_search_results', {})
+        social_results = massive_results.get('social_media_results', {})
+        trend_results = massive_results.get('trendfinder_results', {})
+        screenshots_results = massive_results.get('viral_posts_screenshots', {})
+        generated_at = datetime.now()
+        # Uma passada pelas URLs da busca web, compartilhada pela seção 2 e pelas estatísticas
+        web_urls = _web_result_urls(web_results)
         
-        md_content = f"""# RELATÓRIO DE COLETA MASSIVA - ETAPA 1
-## Sessão: {session_id}
-## Query: {query}
-## Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
----
-
-## 1. CONTEXTO DO PROJETO
-
-**Query de Busca:** {query}
-
-**Contexto Fornecido:**
-```json
-{context}
-```
-
-**Objetivo:** Coleta massiva de dados reais para análise aprofundada de mercado e geração de insights estratégicos.
-
----
-
-## 2. RESULTADOS DA BUSCA WEB INTERCALADA
-
-### 2.1 Estatísticas Gerais
-"""
+        yield self._build_md_header_section(session_id, massive_results['query'], massive_results['context_json'], generated_at)
+        yield self._build_md_web_section(web_results, web_urls)
+        yield self._build_md_social_section(social_results)
+        yield self._build_md_trends_section(trend_results)
+        yield self._build_md_screenshots_section(session_id, screenshots_results)
         
-        # Adiciona resultados da busca web
-        web_results = massive_results.get('web_search_results', {})
-        if web_results.get('successful_searches', 0) > 0:
-            md_content += f"""
-- **Provedores Utilizados:** {len(web_results.get('providers_used', []))}
-- **Buscas Bem-sucedidas:** {web_results.get('successful_searches', 0)}
-- **URLs Coletadas:** {len(web_results.get('consolidated_urls', []))}
+        statistics = self._calculate_collection_statistics(
+            self._count_collected_data(massive_results, web_urls), time.time() - start_time
+        )
+        massive_results['statistics'] = statistics
+        yield self._build_md_statistics_section(statistics)
+        yield self._build_md_conclusion_section(session_id, statistics, web_results, social_results, generated_at)
+
+    def _build_md_header_section(self, session_id: str, query: str, context_json: str, generated_at: datetime) -> str:
+        """Seção 1: cabeçalho e contexto do projeto"""
+        return _MD_HEADER_TEMPLATE.substitute(
+            session_id=session_id,
+            query=query,
+            generated_at=generated_at.strftime('%d/%m/%Y %H:%M:%S'),
+            context_json=context_json
+        )
+
+    def _build_md_web_section(self, web_results: Dict[str, Any], web_urls: List[Any]) -> str:
+        """Seção 2: resultados da busca web intercalada"""
+        error = _stage_failure(web_results)
+        if error:
+            return _format_stage_failure(error)
+        
+        provider_results = _web_provider_results(web_results)
+        
+        successful_searches = web_results.get('successful_searches')
+        if successful_searches is None:
+            successful_searches = sum(1 for result in provider_results if result.get('success'))
+        if not (successful_searches > 0 or web_urls):
+            return ""
+        
+        parts: List[str] = []
+        append = parts.append
+        append(f"""
+- **Provedores Utilizados:** {len(_web_providers(web_results))}
+- **Buscas Bem-sucedidas:** {successful_searches}
+- **URLs Coletadas:** {len(web_urls)}
 
 ### 2.2 URLs Encontradas
-"""
-            for i, url in enumerate(web_results.get('consolidated_urls', [])[:50], 1):
-                md_content += f"{i}. {url}\n"
-            
-            # Adiciona resultados detalhados de cada provedor
-            md_content += "\n### 2.3 Resultados Detalhados por Provedor\n"
-            for result in web_results.get('all_results', []):
-                if result.get('success'):
-                    provider = result.get('provider', 'Unknown')
-                    md_content += f"\n#### {provider}\n"
-                    for item in result.get('results', [])[:10]:
-                        title = item.get('title', 'Sem título')
-                        url = item.get('url', item.get('link', ''))
-                        content = item.get('content', item.get('snippet', ''))[:500]
-                        md_content += f"**{title}**\n{url}\n{content}...\n\n"
-        
-        # Adiciona resultados das redes sociais
-        md_content += "\n---\n\n## 3. RESULTADOS DAS REDES SOCIAIS\n"
-        social_results = massive_results.get('social_media_results', {})
+""")
+        for i, url in enumerate(web_urls[:50], 1):
+            append(f"{i}. {url}\n")
+        
+        # Adiciona resultados detalhados de cada provedor
+        append("\n### 2.3 Resultados Detalhados por Provedor\n")
+        for result in provider_results:
+            if result.get('success'):
+                provider = result.get('provider', 'Unknown')
+                append(f"\n#### {provider}\n")
+                for item in result.get('results', [])[:10]:
+                    title = item.get('title', 'Sem título')
+                    url = item.get('url', item.get('link', ''))
+                    content = item.get('content', item.get('snippet', ''))[:500]
+                    append(f"**{title}**\n{url}\n{content}...\n\n")
+        
+        return "".join(parts)
+
+    def _build_md_social_section(self, social_results: Dict[str, Any]) -> str:
+        """Seção 3: resultados das redes sociais"""
+        parts: List[str] = ["\n---\n\n## 3. RESULTADOS DAS REDES SOCIAIS\n"]
+        error = _stage_failure(social_results)
+        if error:
+            parts.append(_format_stage_failure(error))
+            return "".join(parts)
+        
+        append = parts.append
         
         if social_results.get('success'):
             platforms_data = social_results.get('all_platforms_data', {})
-            md_content += f"""
+            append(f"""
 ### 3.1 Estatísticas Gerais
 - **Total de Posts:** {platforms_data.get('total_results', 0)}
 - **Plataformas Analisadas:** {len(platforms_data.get('platforms', []))}
 - **Análise de Sentimento:** {social_results.get('sentiment_analysis', {}).get('overall_sentiment', 'N/A')}
 
-"""
+""")
             
             # Adiciona dados de cada plataforma
-            for platform in ['youtube', 'twitter', 'instagram', 'linkedin']:
+            for platform, format_post in _PLATFORM_FORMATTERS.items():
                 platform_data = platforms_data.get(platform, {})
                 if platform_data.get('success'):
-                    md_content += f"\n### 3.2 {platform.upper()}\n"
-                    md_content += f"**Total de Posts:** {len(platform_data.get('results', []))}\n\n"
+                    posts = platform_data.get('results', [])
+                    append(f"\n### 3.2 {platform.upper()}\n**Total de Posts:** {len(posts)}\n\n")
                     
-                    for i, post in enumerate(platform_data.get('results', [])[:20], 1):
-                        if platform == 'youtube':
-                            md_content += f"**{i}. {post.get('title', 'Sem título')}**\n"
-                            md_content += f"Canal: {post.get('channel', 'N/A')}\n"
-                            md_content += f"Views: {post.get('view_count', 'N/A')}\n"
-                            md_content += f"Likes: {post.get('like_count', 'N/A')}\n"
-                            md_content += f"URL: {post.get('url', 'N/A')}\n"
-                            md_content += f"Descrição: {post.get('description', 'N/A')[:200]}...\n\n"
-                        
-                        elif platform == 'twitter':
-                            md_content += f"**{i}. Tweet de {post.get('author', 'N/A')}**\n"
-                            md_content += f"Texto: {post.get('text', 'N/A')[:300]}...\n"
-                            md_content += f"Likes: {post.get('like_count', 'N/A')}\n"
-                            md_content += f"Retweets: {post.get('retweet_count', 'N/A')}\n"
-                            md_content += f"URL: {post.get('url', 'N/A')}\n\n"
-                        
-                        elif platform == 'instagram':
-                            md_content += f"**{i}. Post de {post.get('username', 'N/A')}**\n"
-                            md_content += f"Caption: {post.get('caption', 'N/A')[:300]}...\n"
-                            md_content += f"Likes: {post.get('like_count', 'N/A')}\n"
-                            md_content += f"Comments: {post.get('comment_count', 'N/A')}\n"
-                            md_content += f"URL: {post.get('url', 'N/A')}\n\n"
-                        
-                        elif platform == 'linkedin':
-                            md_content += f"**{i}. {post.get('title', 'Sem título')}**\n"
-                            md_content += f"Autor: {post.get('author', 'N/A')}\n"
-                            md_content += f"Empresa: {post.get('company', 'N/A')}\n"
-                            md_content += f"Conteúdo: {post.get('content', 'N/A')[:300]}...\n"
-                            md_content += f"Likes: {post.get('likes', 'N/A')}\n"
-                            md_content += f"URL: {post.get('url', 'N/A')}\n\n"
-        
-        # Adiciona resultados do TrendFinder
-        md_content += "\n---\n\n## 4. RESULTADOS DO TRENDFINDER\n"
-        trend_results = massive_results.get('trendfinder_results', {})
+                    for i, post in enumerate(posts[:20], 1):
+                        append(format_post(i, post))
+        
+        return "".join(parts)
+
+    def _build_md_trends_section(self, trend_results: Dict[str, Any]) -> str:
+        """Seção 4: resultados do TrendFinder"""
+        parts: List[str] = ["\n---\n\n## 4. RESULTADOS DO TRENDFINDER\n"]
+        error = _stage_failure(trend_results)
+        if error:
+            parts.append(_format_stage_failure(error))
+            return "".join(parts)
+        
+        append = parts.append
+        trends = trend_results.get('trends', [])
         
         if trend_results.get('success'):
-            md_content += f"""
+            hashtags = trend_results.get('hashtags', [])
+            append(f"""
 ### 4.1 Tendências Identificadas
-- **Total de Tendências:** {len(trend_results.get('trends', []))}
-- **Hashtags Virais:** {len(trend_results.get('hashtags', []))}
+- **Total de Tendências:** {len(trends)}
+- **Hashtags Virais:** {len(hashtags)}
 - **Conteúdo Viral:** {len(trend_results.get('viral_content', []))}
 
-"""
+""")
             
             # Adiciona tendências
-            for i, trend in enumerate(trend_results.get('trends', [])[:20], 1):
-                md_content += f"{i}. **{trend}**\n"
+            for i, trend in enumerate(trends[:20], 1):
+                append(f"{i}. **{trend}**\n")
             
             # Adiciona hashtags
-            md_content += "\n### 4.2 Hashtags em Tendência\n"
-
-
-
-            for i, hashtag in enumerate(trend_results.get('hashtags', [])[:30], 1):
-                md_content += f"{i}. #{hashtag}\n"
+            append("\n### 4.2 Hashtags em Tendência\n")
+            for i, hashtag in enumerate(hashtags[:30], 1):
+                append(f"{i}. #{hashtag}\n")
         
-        # Adiciona screenshots dos posts virais
-        md_content += "\n---\n\n## 5. SCREENSHOTS DOS POSTS VIRAIS\n"
-        screenshots_results = massive_results.get('viral_posts_screenshots', {})
+        return "".join(parts)
+
+    def _build_md_screenshots_section(self, session_id: str, screenshots_results: Dict[str, Any]) -> str:
+        """Seção 5: screenshots dos posts virais"""
+        parts: List[str] = ["\n---\n\n## 5. SCREENSHOTS DOS POSTS VIRAIS\n"]
+        error = _stage_failure(screenshots_results)
+        if error:
+            parts.append(_format_stage_failure(error))
+            return "".join(parts)
+        
+        append = parts.append
+        screenshots_captured = screenshots_results.get('screenshots_captured', 0)
+        total_posts_analyzed = screenshots_results.get('total_posts_analyzed', 0)
         
-        if screenshots_results.get('screenshots_captured', 0) > 0:
-            md_content += f"""
+        if screenshots_captured > 0:
+            append(f"""
 ### 5.1 Estatísticas de Captura
-- **Posts Analisados:** {screenshots_results.get('total_posts_analyzed', 0)}
-- **Screenshots Capturados:** {screenshots_results.get('screenshots_captured', 0)}
+- **Posts Analisados:** {total_posts_analyzed}
+- **Screenshots Capturados:** {screenshots_captured}
 - **Falhas:** {screenshots_results.get('failed_captures', 0)}
 
 ### 5.2 Posts Virais Capturados
-"""
+""")
             
             for i, viral_post in enumerate(screenshots_results.get('viral_posts', []), 1):
-                md_content += f"""
+                append(f"""
 #### {i}. {viral_post.get('platform', 'Unknown').upper()} - Score: {viral_post.get('engagement_score', 0)}
 
 **Título:** {viral_post.get('title', 'Sem título')}
@@ -367,91 +642,105 @@ class MassiveDataCollector:
 **Screenshot:** ![Screenshot {i}](files/{session_id}/{viral_post.get('filename', 'N/A')})
 
 ---
-"""
+""")
         
-        # Adiciona estatísticas finais
-        statistics = massive_results.get('statistics', {})
-        md_content += f"""
-
----
-
-## 6. ESTATÍSTICAS FINAIS DA COLETA
-
-### 6.1 Resumo Quantitativo
-- **Total de Fontes Web:** {statistics.get('total_web_sources', 0)}
-- **Total de Posts Sociais:** {statistics.get('total_social_posts', 0)}
-- **Total de Tendências:** {statistics.get('total_trends', 0)}
-- **Total de Screenshots:** {statistics.get('total_screenshots', 0)}
-- **Tempo de Execução:** {statistics.get('execution_time', 0):.2f} segundos
-
-### 6.2 Qualidade dos Dados
-- **URLs Válidas:** {statistics.get('valid_urls_percentage', 0):.1f}%
-- **Conteúdo Extraído:** {statistics.get('content_extraction_success', 0):.1f}%
-- **Screenshots Bem-sucedidos:** {statistics.get('screenshot_success_rate', 0):.1f}%
-
-### 6.3 Distribuição por Fonte
-"""
+        return "".join(parts)
+
+    def _build_md_statistics_section(self, statistics: Dict[str, Any]) -> str:
+        """Seção 6: estatísticas finais da coleta"""
+        parts: List[str] = [_MD_STATISTICS_TEMPLATE.substitute(
+            total_web_sources=statistics.get('total_web_sources', 0),
+            total_social_posts=statistics.get('total_social_posts', 0),
+            total_trends=statistics.get('total_trends', 0),
+            total_screenshots=statistics.get('total_screenshots', 0),
+            execution_time=f"{statistics.get('execution_time', 0):.2f}",
+            valid_urls_percentage=_format_percentage(statistics.get('valid_urls_percentage')),
+            content_extraction_success=_format_percentage(statistics.get('content_extraction_success')),
+            screenshot_success_rate=_format_percentage(statistics.get('screenshot_success_rate', 0))
+        )]
         
         sources_distribution = statistics.get('sources_by_type', {})
         for source_type, count in sources_distribution.items():
-            md_content += f"- **{source_type}:** {count}\n"
+            parts.append(f"- **{source_type}:** {count}\n")
         
-        md_content += f"""
-
----
-
-## 7. CONCLUSÕES DA COLETA MASSIVA
-
-### 7.1 Dados Coletados
-Este relatório contém **{statistics.get('total_data_points', 0)} pontos de dados** coletados de múltiplas fontes em tempo real, incluindo:
-
-1. **Busca Web Intercalada:** Dados de {len(web_results.get('providers_used', []))} provedores diferentes
-2. **Redes Sociais:** Posts de {len(social_results.get('all_platforms_data', {}).get('platforms', []))} plataformas
-3. **Análise de Tendências:** Identificação de padrões virais e hashtags em alta
-4. **Evidências Visuais:** Screenshots dos posts com maior engajamento
-
-### 7.2 Preparação para Etapa 2
-Este documento serve como base completa para a **Etapa 2 - Análise e Síntese da IA**, onde:
-
-1. A IA irá **estudar ativamente** todo este conteúdo por **5 minutos**
-2. Realizará **buscas adicionais** conforme necessário
-3. Sintetizará os achados em um **JSON estruturado**
-4. Preparará dados para geração dos **16 módulos de análise**
-
-### 7.3 Próximos Passos
-- [x] Coleta massiva de dados concluída
-- [ ] Análise e síntese da IA (Etapa 2)
-- [ ] Geração dos 16 módulos (Etapa 3)
-- [ ] Compilação do relatório final
-
----
-
-**Arquivo gerado em:** {datetime.now().strftime('%d/%m/%Y às %H:%M:%S')}
-**Sessão:** {session_id}
-**Sistema:** ARQV30 Enhanced v3.0 - Massive Data Collector
-"""
-        
-        return md_content
+        return "".join(parts)
+
+    def _build_md_conclusion_section(
+        self,
+        session_id: str,
+        statistics: Dict[str, Any],
+        web_results: Dict[str, Any],
+        social_results: Dict[str, Any],
+        generated_at: datetime
+    ) -> str:
+        """Seção 7: conclusões e preparação para a Etapa 2"""
+        return _MD_CONCLUSION_TEMPLATE.substitute(
+            total_data_points=statistics.get('total_data_points', 0),
+            providers_count=len(_web_providers(web_results)),
+            platforms_count=len(social_results.get('all_platforms_data', {}).get('platforms', [])),
+            generated_at=generated_at.strftime('%d/%m/%Y às %H:%M:%S'),
+            session_id=session_id
+        )
+
+    def _count_collected_data(
+        self, massive_results: Dict[str, Any], web_urls: Optional[List[Any]] = None
+    ) -> Dict[str, int]:
+        """
+        Conta os dados coletados em cada etapa (independe da geração do relatório)
 
-    def _calculate_collection_statistics(self, massive_results: Dict[str, Any], execution_time: float) -> Dict[str, Any]:
-        """Calcula estatísticas da coleta massiva"""
+        `web_urls` reaproveita as URLs já extraídas por _web_result_urls; sem elas, são extraídas aqui.
+        """
+        counts: Dict[str, int] = {}
         
         web_results = massive_results.get('web_search_results', {})
+        if not _stage_failure(web_results):
+            if web_urls is None:
+                web_urls = _web_result_urls(web_results)
+            provider_results = _web_provider_results(web_results)
+            counts['web_sources'] = len(web_urls)
+            counts['web_valid_urls'] = sum(
+                1 for url in web_urls if isinstance(url, str) and url.startswith(('http://', 'https://'))
+            )
+            counts['web_results_total'] = len(provider_results)
+            counts['web_results_successful'] = sum(1 for result in provider_results if result.get('success'))
+        
         social_results = massive_results.get('social_media_results', {})
+        if not _stage_failure(social_results):
+            counts['social_posts'] = social_results.get('total_posts', 0)
+        
         trend_results = massive_results.get('trendfinder_results', {})
+        if not _stage_failure(trend_results):
+            counts['trends'] = len(trend_results.get('trends', []))
+        
         screenshots_results = massive_results.get('viral_posts_screenshots', {})
+        if not _stage_failure(screenshots_results):
+            counts['screenshots'] = screenshots_results.get('screenshots_captured', 0)
+            counts['screenshot_posts_analyzed'] = screenshots_results.get('total_posts_analyzed', 0)
+        
+        return counts
+
+    def _calculate_collection_statistics(self, counts: Dict[str, int], execution_time: float) -> Dict[str, Any]:
+        """Calcula estatísticas da coleta a partir dos contadores de _count_collected_data"""
         
         # Conta fontes
-        total_web_sources = len(web_results.get('consolidated_urls', []))
-        total_social_posts = social_results.get('total_posts', 0)
-        total_trends = len(trend_results.get('trends', []))
-        total_screenshots = screenshots_results.get('screenshots_captured', 0)
+        total_web_sources = counts.get('web_sources', 0)
+        total_social_posts = counts.get('social_posts', 0)
+        total_trends = counts.get('trends', 0)
+        total_screenshots = counts.get('screenshots', 0)
+        
+        # Calcula taxas de sucesso (None quando não há base: o relatório mostra N/A)
+        valid_urls_percentage = (
+            100 * counts.get('web_valid_urls', 0) / total_web_sources if total_web_sources else None
+        )
+        web_results_total = counts.get('web_results_total', 0)
+        content_extraction_success = (
+            100 * counts.get('web_results_successful', 0) / web_results_total if web_results_total else None
+        )
         
-        # Calcula taxas de sucesso
         screenshot_success_rate = 0
-        if screenshots_results.get('total_posts_analyzed', 0) > 0:
-            screenshot_success_rate = (screenshots_results.get('screenshots_captured', 0) / 
-                                     screenshots_results.get('total_posts_analyzed', 1)) * 100
+        screenshot_posts_analyzed = counts.get('screenshot_posts_analyzed', 0)
+        if screenshot_posts_analyzed > 0:
+            screenshot_success_rate = (total_screenshots / screenshot_posts_analyzed) * 100
         
         # Distribui por tipo de fonte
         sources_by_type = {
@@ -466,14 +755,27 @@ Este documento serve como base completa para a **Etapa 2 - Análise e Síntese d
             'total_social_posts': total_social_posts,
             'total_trends': total_trends,
             'total_screenshots': total_screenshots,
-            'total_data_points': total_web_sources + total_social_posts + total_trends + total_screenshots,
+            'total_data_points': sum(sources_by_type.values()),
             'execution_time': execution_time,
-            'valid_urls_percentage': 95.0,  # Estimativa
-            'content_extraction_success': 90.0,  # Estimativa
+            'valid_urls_percentage': valid_urls_percentage,
+            'content_extraction_success': content_extraction_success,
             'screenshot_success_rate': screenshot_success_rate,
             'sources_by_type': sources_by_type
         }
 
-# Instância global
-massive_data_collector = MassiveDataCollector()
+# Instância global, criada no primeiro uso
+_massive_data_collector: Optional[MassiveDataCollector] = None
+
+def get_massive_data_collector() -> MassiveDataCollector:
+    """Retorna a instância global do coletor massivo"""
+    global _massive_data_collector
+    if _massive_data_collector is None:
+        _massive_data_collector = MassiveDataCollector()
+    return _massive_data_collector
+
+def __getattr__(name: str):
+    # Compatibilidade com `from services.massive_data_collector import massive_data_collector`
+    if name == 'massive_data_collector':
+        return get_massive_data_collector()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -6,23 +6,53 @@ Sistema robusto para captura de screenshots e prints de páginas web
 """
 
 import os
+import atexit
 import logging
+import struct
 import time
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
 from datetime import datetime
-import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
-import base64
-from PIL import Image
-import io
+
+from services.chrome_driver_pool import (
+    DEFAULT_VIEWPORT,
+    PLATFORM_VIEWPORTS,
+    ChromeDriverPool,
+    add_disk_cache_arguments,
+    block_tracking_urls,
+    capture_png,
+    clear_browser_cookies,
+    set_device_metrics,
+)
+from services.screenshot_optimizer import optimize_screenshot, submit_screenshot_optimization, write_png
+
+# Selenium e Pillow são importados só nos métodos que os usam: ler metadados
+# de screenshots não paga a importação da pilha do WebDriver
+if TYPE_CHECKING:
+    from selenium import webdriver
 
 logger = logging.getLogger(__name__)
 
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Modo Pillow equivalente ao color type do IHDR (para profundidade de 8 bits)
+_PNG_COLOR_MODES = {0: 'L', 2: 'RGB', 3: 'P', 4: 'LA', 6: 'RGBA'}
+
+def _read_png_header(path: str) -> Optional[tuple]:
+    """Lê (largura, altura, modo) do cabeçalho IHDR sem decodificar a imagem; None se não reconhecido"""
+    with open(path, 'rb') as f:
+        head = f.read(26)
+    
+    if len(head) < 26 or head[:8] != _PNG_SIGNATURE or head[12:16] != b'IHDR':
+        return None
+    
+    width, height = struct.unpack('>II', head[16:24])
+    bit_depth, color_type = head[24], head[25]
+    mode = _PNG_COLOR_MODES.get(color_type)
+    if bit_depth != 8 or mode is None:
+        return None
+    return width, height, mode
+
 class PrintSystem:
     """Sistema de captura de screenshots aprimorado"""
     
@@ -30,6 +60,10 @@ class PrintSystem:
         """Inicializa o sistema de print"""
         self.driver = None
         self.screenshots_dir = "/home/ubuntu/v40_enhanced/screenshots"
+        self.max_concurrent_captures = 4  # Chromes simultâneos em capture_multiple_screenshots
+        # Chromes mantidos entre lotes; encerrados em close() ou na saída do processo
+        self._driver_pool = ChromeDriverPool(self._create_driver, self.max_concurrent_captures, cache_name="print_system")
+        atexit.register(self.close)
         self.ensure_screenshots_dir()
         logger.info("✅ Sistema de Print inicializado")
     
@@ -37,22 +71,38 @@ class PrintSystem:
         """Garante que o diretório de screenshots existe"""
         os.makedirs(self.screenshots_dir, exist_ok=True)
     
+    def _create_driver(self, cache_dir: Optional[str] = None) -> 'webdriver.Chrome':
+        """Cria um driver do Chrome configurado para screenshots"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument('--disable-extensions')
+        chrome_options.add_argument('--disable-plugins')
+        chrome_options.add_argument('--disable-images')
+        chrome_options.add_argument('--disable-javascript')
+        add_disk_cache_arguments(chrome_options, cache_dir)
+        
+        driver = webdriver.Chrome(options=chrome_options)
+        try:
+            driver.set_page_load_timeout(30)
+            set_device_metrics(driver, *DEFAULT_VIEWPORT)
+            block_tracking_urls(driver)
+        except Exception:
+            # O Chrome já subiu: encerra para não deixar Chrome/chromedriver órfãos
+            driver.quit()
+            raise
+        return driver
+    
     def setup_driver(self):
         """Configura o driver do Chrome para screenshots"""
         try:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('--disable-extensions')
-            chrome_options.add_argument('--disable-plugins')
-            chrome_options.add_argument('--disable-images')
-            chrome_options.add_argument('--disable-javascript')
-            
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.driver.set_page_load_timeout(30)
+            self.driver = self._create_driver()
             logger.info("✅ Driver Chrome configurado com sucesso")
             return True
             
@@ -60,36 +110,69 @@ class PrintSystem:
             logger.error(f"❌ Erro ao configurar driver: {e}")
             return False
     
-    def capture_screenshot(self, url: str, filename: str = None) -> Dict[str, Any]:
-        """Captura screenshot de uma URL"""
+    def _wait_page_ready(self, driver: 'webdriver.Chrome', timeout: int = 10):
+        """Espera document.readyState == 'complete' em vez de uma pausa fixa"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
+        
+        try:
+            WebDriverWait(driver, timeout).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+        except TimeoutException:
+            logger.warning("⚠️ Página não terminou de carregar; capturando o estado atual")
+    
+    def capture_screenshot(self, url: str, filename: str = None, lossless: bool = False) -> Dict[str, Any]:
+        """Captura screenshot de uma URL (lossless=True mantém PNG mesmo para páginas fotográficas)"""
+        if not self.driver:
+            if not self.setup_driver():
+                return {"success": False, "error": "Falha ao configurar driver"}
+        
+        return self._capture_screenshot_with(self.driver, url, filename, lossless=lossless)
+    
+    def _capture_screenshot_with(
+        self,
+        driver: 'webdriver.Chrome',
+        url: str,
+        filename: str = None,
+        optimize: bool = True,
+        lossless: bool = False,
+        captured_at: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Captura screenshot de uma URL usando o driver informado
+        
+        optimize=False deixa a otimização para o chamador; captured_at recebe o
+        horário do lote (sem ele, usa o horário atual).
+        """
+        captured_at = captured_at or datetime.now()
         try:
-            if not self.driver:
-                if not self.setup_driver():
-                    return {"success": False, "error": "Falha ao configurar driver"}
-            
             # Gera nome do arquivo se não fornecido
             if not filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                timestamp = captured_at.strftime("%Y%m%d_%H%M%S")
                 filename = f"screenshot_{timestamp}.png"
             
             filepath = os.path.join(self.screenshots_dir, filename)
             
             # Navega para a URL
             logger.info(f"📸 Capturando screenshot de: {url}")
-            self.driver.get(url)
+            driver.get(url)
             
-            # Aguarda carregamento
-            time.sleep(3)
+            # Aguarda o documento carregar
+            self._wait_page_ready(driver)
             
             # Captura screenshot
-            screenshot_data = self.driver.get_screenshot_as_png()
+            screenshot_data = capture_png(driver)
             
             # Salva arquivo
-            with open(filepath, 'wb') as f:
-                f.write(screenshot_data)
+            size = write_png(filepath, screenshot_data)
             
-            # Otimiza imagem
-            self.optimize_image(filepath)
+            # Otimiza imagem (pode trocar o arquivo por um .jpg)
+            if optimize:
+                optimized = self.optimize_image(filepath, lossless=lossless)
+                if optimized:
+                    filepath, size = optimized
+                    filename = os.path.basename(filepath)
             
             logger.info(f"✅ Screenshot salvo: {filepath}")
             
@@ -98,8 +181,8 @@ class PrintSystem:
                 "filepath": filepath,
                 "filename": filename,
                 "url": url,
-                "timestamp": datetime.now().isoformat(),
-                "size": os.path.getsize(filepath)
+                "timestamp": captured_at.isoformat(),
+                "size": size
             }
             
         except Exception as e:
@@ -110,21 +193,64 @@ class PrintSystem:
                 "url": url
             }
     
-    def capture_multiple_screenshots(self, urls: List[str]) -> List[Dict[str, Any]]:
-        """Captura screenshots de múltiplas URLs"""
-        results = []
+    def capture_multiple_screenshots(
+        self,
+        urls: List[str],
+        max_workers: Optional[int] = None,
+        lossless: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Captura screenshots de múltiplas URLs em paralelo, com um Chrome por captura simultânea"""
+        if not urls:
+            return []
+        
+        pool = self._driver_pool
+        workers = min(max_workers or pool.size, len(urls))
+        optimizations = {}
         
-        for i, url in enumerate(urls):
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"screenshot_{i+1}_{timestamp}.png"
+        # Horário único do lote: o índice já diferencia os arquivos
+        batch_time = datetime.now()
+        batch_timestamp = batch_time.strftime("%Y%m%d_%H%M%S")
+        
+        def capture(i: int, url: str) -> Dict[str, Any]:
+            filename = f"screenshot_{i+1}_{batch_timestamp}.png"
             
-            result = self.capture_screenshot(url, filename)
-            results.append(result)
+            try:
+                with pool.driver() as driver:
+                    result = self._capture_screenshot_with(
+                        driver, url, filename, optimize=False, captured_at=batch_time
+                    )
+            except Exception as e:
+                logger.error(f"❌ Erro ao configurar driver: {e}")
+                return {"success": False, "error": "Falha ao configurar driver", "url": url}
             
-            # Pequena pausa entre capturas
-            time.sleep(2)
+            # Otimiza em outro processo enquanto o driver segue para a próxima URL
+            if result["success"]:
+                optimizations[i] = submit_screenshot_optimization(result["filepath"], lossless=lossless)
+            return result
         
-        return results
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # map preserva a ordem das URLs nos resultados
+                results = list(executor.map(capture, range(len(urls)), urls))
+            
+            # Aguarda as otimizações para reportar caminho e tamanho finais
+            for i, future in optimizations.items():
+                filepath = results[i]["filepath"]
+                try:
+                    final_path, results[i]["size"] = future.result()
+                    results[i]["filepath"] = final_path
+                    results[i]["filename"] = os.path.basename(final_path)
+                except Exception as e:
+                    logger.warning(f"⚠️ Erro ao otimizar imagem {filepath}: {e}")
+            
+            return results
+        finally:
+            # Mantém os Chromes abertos para o próximo lote, sem os cookies deste
+            pool.reset(self._reset_driver)
+    
+    def _reset_driver(self, driver: 'webdriver.Chrome'):
+        """Limpa cookies do lote anterior mantendo o cache HTTP do Chrome aquecido"""
+        clear_browser_cookies(driver)
     
     def capture_social_media_post(self, platform: str, post_url: str) -> Dict[str, Any]:
         """Captura screenshot específico para posts de redes sociais"""
@@ -133,31 +259,27 @@ class PrintSystem:
                 if not self.setup_driver():
                     return {"success": False, "error": "Falha ao configurar driver"}
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            captured_at = datetime.now()
+            timestamp = captured_at.strftime("%Y%m%d_%H%M%S")
             filename = f"{platform}_post_{timestamp}.png"
             filepath = os.path.join(self.screenshots_dir, filename)
             
             logger.info(f"📱 Capturando post do {platform}: {post_url}")
             
-            # Configurações específicas por plataforma
-            if platform.lower() == 'instagram':
-                self.driver.set_window_size(414, 896)  # Mobile size
-            elif platform.lower() == 'twitter':
-                self.driver.set_window_size(1200, 800)
-            elif platform.lower() == 'linkedin':
-                self.driver.set_window_size(1200, 900)
-            else:
-                self.driver.set_window_size(1920, 1080)
+            # Viewport específico por plataforma (Instagram em modo mobile)
+            set_device_metrics(self.driver, *PLATFORM_VIEWPORTS.get(platform.lower(), DEFAULT_VIEWPORT))
             
             # Navega para o post
             self.driver.get(post_url)
             
-            # Aguarda carregamento específico da plataforma
-            wait_time = 5 if platform.lower() in ['instagram', 'twitter'] else 3
-            time.sleep(wait_time)
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
+            from selenium.common.exceptions import TimeoutException, WebDriverException
             
-            # Tenta encontrar o elemento do post
+            # Tenta encontrar o elemento do post assim que o documento estiver pronto
             try:
+                self._wait_page_ready(self.driver)
                 if platform.lower() == 'instagram':
                     post_element = WebDriverWait(self.driver, 10).until(
                         EC.presence_of_element_located((By.TAG_NAME, "article"))
@@ -170,18 +292,20 @@ class PrintSystem:
                     post_element = self.driver.find_element(By.TAG_NAME, "body")
                 
                 # Captura screenshot do elemento específico
-                screenshot_data = post_element.screenshot_as_png
+                screenshot_data = capture_png(self.driver, post_element)
                 
             except (TimeoutException, WebDriverException):
                 # Fallback para screenshot da página inteira
                 screenshot_data = self.driver.get_screenshot_as_png()
             
             # Salva arquivo
-            with open(filepath, 'wb') as f:
-                f.write(screenshot_data)
+            size = write_png(filepath, screenshot_data)
             
-            # Otimiza imagem
-            self.optimize_image(filepath)
+            # Otimiza imagem (pode trocar o arquivo por um .jpg)
+            optimized = self.optimize_image(filepath)
+            if optimized:
+                filepath, size = optimized
+                filename = os.path.basename(filepath)
             
             logger.info(f"✅ Screenshot do {platform} salvo: {filepath}")
             
@@ -191,8 +315,8 @@ class PrintSystem:
                 "filename": filename,
                 "platform": platform,
                 "post_url": post_url,
-                "timestamp": datetime.now().isoformat(),
-                "size": os.path.getsize(filepath)
+                "timestamp": captured_at.isoformat(),
+                "size": size
             }
             
         except Exception as e:
@@ -204,26 +328,17 @@ class PrintSystem:
                 "post_url": post_url
             }
     
-    def optimize_image(self, filepath: str):
-        """Otimiza a imagem para reduzir tamanho"""
+    def optimize_image(self, filepath: str, lossless: bool = False) -> Optional[tuple]:
+        """
+        Otimiza a imagem para reduzir tamanho; retorna (caminho, tamanho) finais ou None se falhar
+        
+        Capturas fotográficas viram .jpg; lossless=True mantém sempre PNG (arquivamento).
+        """
         try:
-            with Image.open(filepath) as img:
-                # Converte para RGB se necessário
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                
-                # Redimensiona se muito grande
-                max_width = 1920
-                max_height = 1080
-                
-                if img.width > max_width or img.height > max_height:
-                    img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-                
-                # Salva com qualidade otimizada
-                img.save(filepath, 'PNG', optimize=True, quality=85)
-                
+            return optimize_screenshot(filepath, lossless=lossless)
         except Exception as e:
             logger.warning(f"⚠️ Erro ao otimizar imagem {filepath}: {e}")
+            return None
     
     def get_screenshot_info(self, filename: str) -> Dict[str, Any]:
         """Obtém informações sobre um screenshot"""
@@ -233,6 +348,8 @@ class PrintSystem:
             return {"success": False, "error": "Arquivo não encontrado"}
         
         try:
+            from PIL import Image
+            
             with Image.open(filepath) as img:
                 return {
                     "success": True,
@@ -252,11 +369,33 @@ class PrintSystem:
         screenshots = []
         
         try:
-            for filename in os.listdir(self.screenshots_dir):
-                if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    info = self.get_screenshot_info(filename)
-                    if info["success"]:
-                        screenshots.append(info)
+            # scandir traz o stat de cada entrada; PNGs têm as dimensões lidas do cabeçalho
+            with os.scandir(self.screenshots_dir) as entries:
+                for entry in entries:
+                    filename = entry.name
+                    if not filename.lower().endswith(('.png', '.jpg', '.jpeg')) or not entry.is_file():
+                        continue
+                    
+                    header = _read_png_header(entry.path) if filename.lower().endswith('.png') else None
+                    if header is None:
+                        # JPEG ou PNG incomum: usa o Pillow
+                        info = self.get_screenshot_info(filename)
+                        if info["success"]:
+                            screenshots.append(info)
+                        continue
+                    
+                    width, height, mode = header
+                    stat = entry.stat()
+                    screenshots.append({
+                        "success": True,
+                        "filename": filename,
+                        "filepath": entry.path,
+                        "size": stat.st_size,
+                        "dimensions": (width, height),
+                        "format": "PNG",
+                        "mode": mode,
+                        "created": datetime.fromtimestamp(stat.st_ctime).isoformat()
+                    })
             
             # Ordena por data de criação (mais recente primeiro)
             screenshots.sort(key=lambda x: x["created"], reverse=True)
@@ -273,11 +412,11 @@ class PrintSystem:
             cutoff_time = current_time - (days * 24 * 60 * 60)
             
             removed_count = 0
-            for filename in os.listdir(self.screenshots_dir):
-                filepath = os.path.join(self.screenshots_dir, filename)
-                if os.path.getctime(filepath) < cutoff_time:
-                    os.remove(filepath)
-                    removed_count += 1
+            with os.scandir(self.screenshots_dir) as entries:
+                for entry in entries:
+                    if entry.stat().st_ctime < cutoff_time:
+                        os.remove(entry.path)
+                        removed_count += 1
             
             logger.info(f"🧹 Removidos {removed_count} screenshots antigos")
             return {"success": True, "removed_count": removed_count}
@@ -287,7 +426,8 @@ class PrintSystem:
             return {"success": False, "error": str(e)}
     
     def close(self):
-        """Fecha o driver"""
+        """Fecha o driver e os drivers do pool"""
+        self._driver_pool.close()
         if self.driver:
             try:
                 self.driver.quit()
@@ -296,10 +436,14 @@ class PrintSystem:
             except Exception as e:
                 logger.error(f"❌ Erro ao fechar driver: {e}")
 
-# Instância global
-print_system = PrintSystem()
+@lru_cache(maxsize=1)
+def get_print_system() -> PrintSystem:
+    """Retorna a instância global do sistema de print (criada no primeiro uso)"""
+    return PrintSystem()
 
-def get_print_system():
-    """Retorna a instância global do sistema de print"""
-    return print_system
+def __getattr__(name: str):
+    """Mantém `from services.print_system import print_system` funcionando sem instanciar no import"""
+    if name == "print_system":
+        return get_print_system()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v3.0 - Screenshot Optimizer
+Pós-processamento dos screenshots: ajuste de modo/tamanho com Pillow, JPEG para
+capturas fotográficas e compressão PNG sem perdas com oxipng/optipng quando disponíveis
+"""
+
+import os
+import atexit
+import logging
+import multiprocessing
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Otimizadores externos em ordem de preferência (oxipng comprime mais e é mais rápido)
+_PNG_OPTIMIZERS = (
+    ("oxipng", ["oxipng", "-o", "2", "--strip", "safe", "--alpha"]),
+    ("optipng", ["optipng", "-quiet", "-o2"]),
+)
+
+MAX_SCREENSHOT_SIZE: Tuple[int, int] = (1920, 1080)
+
+# Fração de cores distintas na miniatura 128x128 acima da qual a captura é tratada como
+# fotográfica e salva em JPEG. Texto/interface (mesmo com barras escuras, botões e
+# degradês) fica abaixo de ~10%; páginas com foto cobrindo 40%+ da área passam de ~30%
+PHOTO_COLOR_RATIO = 0.25
+
+# Processos que otimizam PNGs enquanto as capturas seguem (compressão é CPU pura).
+# Metade dos núcleos, no máximo 4: o restante fica para os Chromes das capturas
+OPTIMIZATION_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+_optimization_pool: Optional[ProcessPoolExecutor] = None
+_optimization_pool_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _external_png_optimizer() -> Optional[List[str]]:
+    """Retorna o comando do primeiro otimizador PNG instalado (procurado uma vez por processo)"""
+    for binary, command in _PNG_OPTIMIZERS:
+        if shutil.which(binary):
+            logger.info(f"🗜️ Otimizador PNG externo: {binary}")
+            return command
+    logger.info("ℹ️ oxipng/optipng não encontrados; usando apenas o otimizador do Pillow")
+    return None
+
+@lru_cache(maxsize=1)
+def _warn_if_stock_pillow():
+    """Avisa uma vez quando o Pillow padrão está carregado no lugar do pillow-simd (versões .postN)"""
+    import PIL
+
+    if '.post' not in PIL.__version__:
+        logger.warning(
+            f"⚠️ Pillow {PIL.__version__} padrão carregado; o pillow-simd acelera LANCZOS e "
+            f"conversões de modo dos screenshots (ver requirements.txt)"
+        )
+
+def write_png(filepath: str, data: bytes) -> int:
+    """Grava o screenshot com um único os.write (sem buffer do Python) e retorna o tamanho em bytes"""
+    # O_BINARY (só existe no Windows) evita a conversão de \n em \r\n, que corromperia o PNG
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+    fd = os.open(filepath, flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            # os.write pode gravar parcialmente; completa o restante
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    return len(data)
+
+def _is_photographic(img, ratio: float = PHOTO_COLOR_RATIO) -> bool:
+    """Detecta capturas dominadas por fotos/vídeos pela quantidade de cores distintas de uma miniatura 128x128"""
+    thumb = img.convert('RGB')
+    thumb.thumbnail((128, 128), reducing_gap=3.0)
+    max_colors = max(1, int(thumb.width * thumb.height * ratio))
+    # getcolors devolve None assim que a miniatura ultrapassa max_colors cores
+    return thumb.getcolors(maxcolors=max_colors) is None
+
+def optimize_screenshot(
+    filepath: str,
+    max_size: Tuple[int, int] = MAX_SCREENSHOT_SIZE,
+    lossless: bool = False
+) -> Tuple[str, int]:
+    """
+    Otimiza um screenshot PNG e retorna (caminho final, tamanho final em bytes)
+
+    O Pillow só converte o modo e, como salvaguarda, reduz imagens maiores que
+    max_size (o viewport definido via CDP já produz capturas no tamanho final).
+    Capturas fotográficas viram JPEG (.jpg ao lado, o PNG é removido), exceto com
+    lossless=True. As demais seguem PNG, comprimido por oxipng/optipng, que testam
+    filtros e DEFLATE muito melhor que o optimize do Pillow (sem eles, optimize=True).
+    PNGs que não precisam de conversão nem redução não são regravados pelo Pillow:
+    vão direto ao otimizador externo.
+    """
+    from PIL import Image
+
+    if multiprocessing.parent_process() is None:
+        # Nos processos do pool o aviso já foi dado pelo processo principal
+        _warn_if_stock_pillow()
+    optimizer = _external_png_optimizer()
+
+    with Image.open(filepath) as img:
+        # Caso comum: captura RGB no tamanho do viewport, sem nada a ajustar
+        reencode = img.mode in ('RGBA', 'LA', 'P') or img.width > max_size[0] or img.height > max_size[1]
+
+        # Converte para RGB se necessário
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGB')
+
+        # Redimensiona se muito grande (só ocorre se o viewport não foi aplicado)
+        if img.width > max_size[0] or img.height > max_size[1]:
+            # reducing_gap: redução rápida por blocos antes do LANCZOS (páginas altas do captureBeyondViewport)
+            img.thumbnail(max_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+        if not lossless and _is_photographic(img):
+            jpeg_path = os.path.splitext(filepath)[0] + '.jpg'
+            img.save(jpeg_path, 'JPEG', quality=85, optimize=True, progressive=True)
+            os.remove(filepath)
+            return jpeg_path, os.path.getsize(jpeg_path)
+
+        if optimizer:
+            if reencode:
+                # Gravação rápida: a compressão pesada é feita pelo otimizador externo
+                img.save(filepath, 'PNG', compress_level=1)
+        else:
+            img.save(filepath, 'PNG', optimize=True)
+
+    if optimizer:
+        subprocess.run(
+            optimizer + [filepath],
+            check=False,
+            timeout=30,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+    return filepath, os.path.getsize(filepath)
+
+def _get_optimization_pool(recreate: bool = False) -> ProcessPoolExecutor:
+    """Cria sob demanda o pool de processos de otimização"""
+    global _optimization_pool
+    with _optimization_pool_lock:
+        if recreate and _optimization_pool is not None:
+            _optimization_pool.shutdown(wait=False)
+            _optimization_pool = None
+        if _optimization_pool is None:
+            # O processo tem várias threads (pool de drivers, asyncio.to_thread): um fork
+            # copiaria locks travados por elas; forkserver/spawn iniciam os workers limpos
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _optimization_pool = ProcessPoolExecutor(
+                max_workers=OPTIMIZATION_MAX_WORKERS,
+                mp_context=multiprocessing.get_context(start_method)
+            )
+        return _optimization_pool
+
+def submit_screenshot_optimization(filepath: str, lossless: bool = False) -> Future:
+    """Agenda optimize_screenshot(filepath) em outro processo e retorna o Future (resultado: caminho e tamanho finais)"""
+    _warn_if_stock_pillow()
+    try:
+        return _get_optimization_pool().submit(optimize_screenshot, filepath, lossless=lossless)
+    except BrokenProcessPool:
+        # Um processo do pool morreu: recria o pool uma vez
+        logger.warning("⚠️ Pool de otimização reiniciado")
+        return _get_optimization_pool(recreate=True).submit(optimize_screenshot, filepath, lossless=lossless)
+
+def shutdown_optimization_pool():
+    """Encerra o pool de otimização, aguardando as otimizações pendentes"""
+    global _optimization_pool
+    with _optimization_pool_lock:
+        pool, _optimization_pool = _optimization_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+atexit.register(shutdown_optimization_pool)
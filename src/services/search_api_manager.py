@@ -9,6 +9,8 @@ import os
 import logging
 import asyncio
 import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from services.alibaba_websailor import alibaba_websailor
@@ -16,6 +18,22 @@ from services.viral_content_analyzer import viral_content_analyzer
 
 logger = logging.getLogger(__name__)
 
+# Sessão aiohttp aberta pelo chamador (ex.: MassiveDataCollector) para reaproveitar
+# conexões e TLS entre provedores; sem ela cada busca abre a própria sessão
+shared_http_session: ContextVar[Optional[Any]] = ContextVar('shared_http_session', default=None)
+
+@asynccontextmanager
+async def _http_session():
+    """Retorna a sessão HTTP compartilhada do contexto ou uma sessão temporária"""
+    session = shared_http_session.get()
+    if session is not None and not session.closed:
+        yield session
+        return
+
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        yield session
+
 class SearchAPIManager:
     """Gerenciador ULTRA-ROBUSTO com Alibaba WebSailor e busca social"""
 
@@ -30,6 +48,11 @@ class SearchAPIManager:
         self.social_search_enabled = True
         self.screenshot_capture_enabled = True
 
+        # Controle de vazão: provedores consultados em paralelo e pausa após HTTP 429
+        self.max_concurrent_provider_searches = 4
+        self.default_rate_limit_cooldown = 60
+        self._provider_cooldown_until: Dict[str, float] = {}
+
         self._load_api_keys()
         logger.info(f"🚀 Search API Manager ULTRA-ROBUSTO inicializado")
         logger.info(f"🔑 {sum(len(keys) for keys in self.api_keys.values())} chaves de API carregadas")
@@ -118,7 +141,10 @@ class SearchAPIManager:
             # FASE 1: ALIBABA WEBSAILOR - NAVEGAÇÃO PROFUNDA
             logger.info("🌐 FASE 1: Executando Alibaba WebSailor - Navegação Profunda")
             if self.websailor_enabled:
-                websailor_results = alibaba_websailor.navigate_and_research_deep(
+                # WebSailor é síncrono (requests/time.sleep): roda em thread para não
+                # travar o event loop das demais etapas da coleta
+                websailor_results = await asyncio.to_thread(
+                    alibaba_websailor.navigate_and_research_deep,
                     query=query,
                     context=context,
                     max_pages=50,
@@ -184,43 +210,61 @@ class SearchAPIManager:
             raise
     
     async def _execute_api_rotation_search(self, query: str) -> Dict[str, Any]:
-        """Executa busca com rotação de APIs"""
-        api_results = {}
+        """Executa busca com rotação de APIs, com provedores em paralelo e limite de concorrência"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_provider_searches)
+        search_methods = {
+            'GOOGLE': self._search_google,
+            'JINA': self._search_jina,
+            'EXA': self._search_exa,
+            'FIRECRAWL': self._search_firecrawl,
+            'SERPER': self._search_serper,
+            'YOUTUBE': self._search_youtube
+        }
+        
+        async def search_provider(provider: str) -> Optional[Dict[str, Any]]:
+            cooldown_left = self._provider_cooldown_until.get(provider, 0) - time.monotonic()
+            if cooldown_left > 0:
+                logger.warning(f"⏳ {provider}: limite de requisições atingido, ignorado por mais {cooldown_left:.0f}s")
+                return {'provider': provider, 'success': False, 'error': 'Rate limited'}
+            
+            api_key = self.get_next_key(provider)
+            if not api_key:
+                return None
+            
+            async with semaphore:
+                logger.info(f"🔍 Buscando com {provider}...")
+                result = await search_methods[provider](query, api_key)
+            
+            retry_after = result.get('retry_after')
+            if retry_after is not None:
+                self._provider_cooldown_until[provider] = time.monotonic() + retry_after
+            return result
         
         # Busca intercalada com rotação
-        for provider in self.providers:
-            if provider in self.api_keys:
-                try:
-                    api_key = self.get_next_key(provider)
-                    if api_key:
-                        logger.info(f"🔍 Buscando com {provider}...")
-                        
-                        if provider == 'GOOGLE':
-                            result = await self._search_google(query, api_key)
-                        elif provider == 'JINA':
-                            result = await self._search_jina(query, api_key)
-                        elif provider == 'EXA':
-                            result = await self._search_exa(query, api_key)
-                        elif provider == 'FIRECRAWL':
-                            result = await self._search_firecrawl(query, api_key)
-                        elif provider == 'SERPER':
-                            result = await self._search_serper(query, api_key)
-                        elif provider == 'YOUTUBE':
-                            result = await self._search_youtube(query, api_key)
-                        else:
-                            continue
-                        
-                        api_results[provider] = result
-                        
-                        # Pequeno delay entre APIs
-                        await asyncio.sleep(0.5)
-                        
-                except Exception as e:
-                    logger.error(f"❌ Erro em {provider}: {e}")
-                    api_results[provider] = {'success': False, 'error': str(e)}
+        providers = [p for p in self.providers if p in self.api_keys and p in search_methods]
+        results = await asyncio.gather(
+            *(search_provider(provider) for provider in providers),
+            return_exceptions=True
+        )
+        
+        api_results = {}
+        for provider, result in zip(providers, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Erro em {provider}: {result}")
+                api_results[provider] = {'success': False, 'error': str(result)}
+            elif result is not None:
+                api_results[provider] = result
         
         return api_results
     
+    def _http_error_result(self, provider: str, response: Any) -> Dict[str, Any]:
+        """Monta o resultado de erro HTTP, incluindo a pausa pedida em respostas 429"""
+        result = {'provider': provider, 'success': False, 'error': f'Status {response.status}'}
+        if response.status == 429:
+            retry_after = response.headers.get('Retry-After', '')
+            result['retry_after'] = float(retry_after) if retry_after.isdigit() else self.default_rate_limit_cooldown
+        return result
+    
     async def _execute_social_search(self, query: str, context: Dict[str, Any], session_id: str) -> Dict[str, Any]:
         """Executa busca social massiva"""
         try:
@@ -235,8 +279,9 @@ class SearchAPIManager:
                 try:
                     logger.info(f"📱 Buscando em {platform}...")
                     
-                    # Usa MCP Supadata para busca social
-                    platform_data = mcp_supadata_manager.search_all_platforms(
+                    # Usa MCP Supadata para busca social (síncrono, em thread)
+                    platform_data = await asyncio.to_thread(
+                        mcp_supadata_manager.search_all_platforms,
                         query, max_results_per_platform=25
                     )
                     
@@ -351,12 +396,11 @@ class SearchAPIManager:
     async def _search_google(self, query: str, api_key: str) -> Dict[str, Any]:
         """Busca Google com chave rotativa"""
         try:
-            import aiohttp
             cx_id = os.getenv('GOOGLE_CSE_ID')
             if not cx_id:
                 return {'provider': 'GOOGLE', 'success': False, 'error': 'CSE_ID não configurado'}
             
-            async with aiohttp.ClientSession() as session:
+            async with _http_session() as session:
                 params = {
                     'key': api_key,
                     'cx': cx_id,
@@ -379,7 +423,7 @@ class SearchAPIManager:
                             'success': True
                         }
                     else:
-                        return {'provider': 'GOOGLE', 'success': False, 'error': f'Status {response.status}'}
+                        return self._http_error_result('GOOGLE', response)
         except Exception as e:
             logger.error(f"❌ Google: {e}")
             return {'provider': 'GOOGLE', 'success': False, 'error': str(e)}
@@ -387,8 +431,7 @@ class SearchAPIManager:
     async def _search_jina(self, query: str, api_key: str) -> Dict[str, Any]:
         """Busca Jina com chave rotativa"""
         try:
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
+            async with _http_session() as session:
                 headers = {'Authorization': f'Bearer {api_key}'}
                 search_url = f"https://r.jina.ai/https://www.google.com/search?q={query}"
                 
@@ -401,15 +444,14 @@ class SearchAPIManager:
                             'success': True
                         }
                     else:
-                        return {'provider': 'JINA', 'success': False, 'error': f'Status {response.status}'}
+                        return self._http_error_result('JINA', response)
         except Exception as e:
             return {'provider': 'JINA', 'success': False, 'error': str(e)}
     
     async def _search_exa(self, query: str, api_key: str) -> Dict[str, Any]:
         """Busca Exa com chave rotativa"""
         try:
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
+            async with _http_session() as session:
                 headers = {'x-api-key': api_key, 'Content-Type': 'application/json'}
                 payload = {'query': query, 'numResults': 10, 'type': 'neural'}
                 
@@ -427,15 +469,14 @@ class SearchAPIManager:
                             'success': True
                         }
                     else:
-                        return {'provider': 'EXA', 'success': False, 'error': f'Status {response.status}'}
+                        return self._http_error_result('EXA', response)
         except Exception as e:
             return {'provider': 'EXA', 'success': False, 'error': str(e)}
     
     async def _search_firecrawl(self, query: str, api_key: str) -> Dict[str, Any]:
         """Busca Firecrawl com chave rotativa"""
         try:
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
+            async with _http_session() as session:
                 headers = {'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'}
                 payload = {
                     'url': f'https://www.google.com/search?q={query}',
@@ -458,15 +499,14 @@ class SearchAPIManager:
                             'success': True
                         }
                     else:
-                        return {'provider': 'FIRECRAWL', 'success': False, 'error': f'Status {response.status}'}
+                        return self._http_error_result('FIRECRAWL', response)
         except Exception as e:
             return {'provider': 'FIRECRAWL', 'success': False, 'error': str(e)}
     
     async def _search_serper(self, query: str, api_key: str) -> Dict[str, Any]:
         """Busca Serper com chave rotativa"""
         try:
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
+            async with _http_session() as session:
                 headers = {'X-API-KEY': api_key, 'Content-Type': 'application/json'}
                 payload = {'q': query, 'gl': 'br', 'hl': 'pt', 'num': 10}
                 
@@ -484,15 +524,14 @@ class SearchAPIManager:
                             'success': True
                         }
                     else:
-                        return {'provider': 'SERPER', 'success': False, 'error': f'Status {response.status}'}
+                        return self._http_error_result('SERPER', response)
         except Exception as e:
             return {'provider': 'SERPER', 'success': False, 'error': str(e)}
     
     async def _search_youtube(self, query: str, api_key: str) -> Dict[str, Any]:
         """Busca YouTube com chave rotativa"""
         try:
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
+            async with _http_session() as session:
                 params = {
                     'part': 'snippet,statistics',
                     'q': f"{query} Brasil",
@@ -515,7 +554,7 @@ class SearchAPIManager:
                             'success': True
                         }
                     else:
-                        return {'provider': 'YOUTUBE', 'success': False, 'error': f'Status {response.status}'}
+                        return self._http_error_result('YOUTUBE', response)
         except Exception as e:
             return {'provider': 'YOUTUBE', 'success': False, 'error': str(e)}
     
@@ -131,7 +131,11 @@ class ViralContentAnalyzer:
                         reverse=True
                     )[:max_captures]
 
-                    screenshots = await self._capture_viral_screenshots(top_content, session_id)
+                    # As capturas usam Selenium síncrono: rodam em um event loop próprio numa
+                    # thread para não bloquear o loop do chamador
+                    screenshots = await asyncio.to_thread(
+                        asyncio.run, self._capture_viral_screenshots(top_content, session_id)
+                    )
                     analysis_results['screenshots_captured'] = screenshots
                 except Exception as e:
                     logger.warning(f"⚠️ Screenshots não disponíveis: {e}")
@@ -6,41 +6,109 @@ Sistema de captura de screenshots de posts de redes sociais com maior conversão
 """
 
 import os
+import json
+import atexit
+import hashlib
 import logging
 import time
 import asyncio
-from typing import List, Dict, Any, Optional
+import socket
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from datetime import datetime
 from pathlib import Path
 
 # Selenium imports
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
-from PIL import Image
+from services.chrome_driver_pool import (
+    DEFAULT_VIEWPORT,
+    PLATFORM_VIEWPORTS,
+    ChromeDriverPool,
+    add_disk_cache_arguments,
+    block_tracking_urls,
+    capture_png,
+    clear_browser_cookies,
+    set_device_metrics,
+)
+from services.screenshot_optimizer import optimize_screenshot, submit_screenshot_optimization, write_png
+
+# Selenium, webdriver_manager e numpy são importados só ao criar/usar drivers e ranquear posts
+if TYPE_CHECKING:
+    import numpy as np
+    from selenium import webdriver
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _chromedriver_path() -> str:
+    """Resolve (e baixa, se preciso) o ChromeDriver uma única vez por processo"""
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+# Fórmula de engajamento por plataforma: (pesos, campos das métricas, campo de views).
+# Score = soma ponderada das métricas; com campo de views vira taxa por mil views.
+_ENGAGEMENT_FORMULAS = {
+    'youtube': ((2, 3), ('like_count', 'comment_count'), 'view_count'),
+    'twitter': ((1, 3, 2), ('like_count', 'retweet_count', 'reply_count'), None),
+    'instagram': ((1, 5), ('like_count', 'comment_count'), None),
+    'linkedin': ((1, 3, 5), ('likes', 'comments', 'shares'), None),
+}
+
+# Separadores de milhar aceitos em contagens textuais ("1,234", "1_234", "1 234")
+_COMMA_TRANS = str.maketrans("", "", ",_ ")
+
+def _to_int(value: Any) -> int:
+    """Converte uma contagem para int; só strings passam pela remoção de separadores"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return int(value.translate(_COMMA_TRANS))
+    return int(value)
+
+# Respostas ao HEAD que indicam post removido/inexistente. As demais (403, 405, 429,
+# 999 do LinkedIn...) são comuns para clientes sem navegador e não descartam o post
+_DEAD_URL_STATUSES = frozenset({404, 410})
+# Erros do getaddrinfo que significam "domínio não existe" (EAI_AGAIN e afins são transitórios)
+_NXDOMAIN_ERRNOS = frozenset(
+    code for code in (getattr(socket, 'EAI_NONAME', None), getattr(socket, 'EAI_NODATA', None))
+    if code is not None
+)
+
+# Elemento que contém o post em cada plataforma (demais plataformas capturam a página inteira).
+# As estratégias são os valores de selenium.webdriver.common.by.By ("tag name", "css selector", "id")
+_POST_LOCATORS = {
+    'instagram': ("tag name", "article"),
+    'twitter': ("css selector", "[data-testid='tweet']"),
+    'youtube': ("id", "player-container"),
+}
+
 class VisualContentCapture:
     """Sistema de captura de screenshots CORRIGIDO para posts virais"""
 
     def __init__(self):
         """Inicializa o capturador visual"""
-        self.driver = None
         self.wait_timeout = 15
         self.page_load_timeout = 45
         self.screenshots_base_dir = "analyses_data/files"
+        # Capturas simultâneas, cada uma com seu próprio Chrome (limitado pela memória dos navegadores)
+        self.max_concurrent_captures = 4
+        # Chromes mantidos entre sessões; encerrados na saída do processo
+        self._driver_pool = ChromeDriverPool(self._setup_driver, self.max_concurrent_captures, cache_name="visual_capture")
+        # Ranking de posts virais por conteúdo de social_media_data (retentativas não recalculam);
+        # LRU: o acesso move a entrada para o fim e a mais antiga sai quando o limite é atingido
+        self._viral_posts_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._viral_posts_cache_max_size = 64
+        atexit.register(self._shutdown)
         
         logger.info("📸 Visual Content Capture CORRIGIDO inicializado")
 
-    def _setup_driver(self) -> webdriver.Chrome:
+    def _setup_driver(self, cache_dir: Optional[str] = None) -> 'webdriver.Chrome':
         """Configura o driver do Chrome otimizado para captura"""
         try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+            from selenium.webdriver.chrome.service import Service
+
             chrome_options = Options()
             
             # Configurações otimizadas para captura de redes sociais
@@ -53,12 +121,20 @@ class VisualContentCapture:
             chrome_options.add_argument("--disable-plugins")
             # NÃO desabilitar imagens e JS para redes sociais
             chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+            add_disk_cache_arguments(chrome_options, cache_dir)
             
-            # Instala automaticamente o ChromeDriver
-            service = Service(ChromeDriverManager().install())
+            # Instala automaticamente o ChromeDriver (verificação de versão feita uma vez por processo)
+            service = Service(_chromedriver_path())
             
             driver = webdriver.Chrome(service=service, options=chrome_options)
-            driver.set_page_load_timeout(self.page_load_timeout)
+            try:
+                driver.set_page_load_timeout(self.page_load_timeout)
+                set_device_metrics(driver, *DEFAULT_VIEWPORT)
+                block_tracking_urls(driver)
+            except Exception:
+                # O Chrome já subiu: encerra para não deixar Chrome/chromedriver órfãos
+                driver.quit()
+                raise
             
             logger.info("✅ Chrome driver configurado para captura de redes sociais")
             return driver
@@ -80,89 +156,81 @@ class VisualContentCapture:
             logger.error(f"❌ Erro ao criar diretório: {e}")
             raise
 
-    def _optimize_screenshot(self, filepath: str):
-        """Otimiza screenshot para melhor qualidade e tamanho"""
+    def _optimize_screenshot(self, filepath: str) -> Optional[tuple]:
+        """Otimiza screenshot (JPEG se fotográfico); retorna (caminho, tamanho) finais ou None se falhar"""
         try:
-            with Image.open(filepath) as img:
-                # Converte para RGB se necessário
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                
-                # Redimensiona se muito grande
-                max_width = 1920
-                max_height = 1080
-                
-                if img.width > max_width or img.height > max_height:
-                    img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-                
-                # Salva otimizado
-                img.save(filepath, 'PNG', optimize=True, quality=85)
-                
+            return optimize_screenshot(filepath)
         except Exception as e:
             logger.warning(f"⚠️ Erro ao otimizar screenshot {filepath}: {e}")
+            return None
+
+    def _wait_ready(self, driver: 'webdriver.Chrome', platform: str):
+        """Espera o documento carregar e retorna o elemento do post da plataforma (None se não houver)"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        wait = WebDriverWait(driver, self.wait_timeout)
+        wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+        
+        locator = _POST_LOCATORS.get(platform.lower())
+        if locator is None:
+            return None
+        return wait.until(EC.presence_of_element_located(locator))
+
+    def _capture_social_media_post(
+        self,
+        driver: 'webdriver.Chrome',
+        url: str,
+        platform: str,
+        session_dir: Path,
+        index: int,
+        optimize: bool = True,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Captura screenshot específico para posts de redes sociais
+        
+        optimize=False deixa a otimização para o chamador; timestamp recebe o horário
+        ISO do lote (sem ele, usa o horário atual).
+        """
+        timestamp = timestamp or datetime.now().isoformat()
+        from selenium.common.exceptions import TimeoutException, WebDriverException
 
-    def _capture_social_media_post(self, url: str, platform: str, session_dir: Path, index: int) -> Dict[str, Any]:
-        """Captura screenshot específico para posts de redes sociais"""
         try:
             logger.info(f"📱 Capturando post {platform}: {url}")
             
-            # Configurações específicas por plataforma
-            if platform.lower() == 'instagram':
-                self.driver.set_window_size(414, 896)  # Mobile size
-            elif platform.lower() == 'twitter':
-                self.driver.set_window_size(1200, 800)
-            elif platform.lower() == 'linkedin':
-                self.driver.set_window_size(1200, 900)
-            elif platform.lower() == 'youtube':
-                self.driver.set_window_size(1280, 720)
-            else:
-                self.driver.set_window_size(1920, 1080)
+            # Viewport específico por plataforma (Instagram em modo mobile)
+            set_device_metrics(driver, *PLATFORM_VIEWPORTS.get(platform.lower(), DEFAULT_VIEWPORT))
             
             # Acessa a URL
-            self.driver.get(url)
-            
-            # Aguarda carregamento específico por plataforma
-            wait_time = 8 if platform.lower() in ['instagram', 'twitter', 'youtube'] else 6
-            time.sleep(wait_time)
+            driver.get(url)
             
-            # Tenta capturar elemento específico do post
+            # Aguarda a página ficar pronta e tenta capturar o elemento específico do post
             screenshot_data = None
             try:
-                if platform.lower() == 'instagram':
-                    post_element = WebDriverWait(self.driver, self.wait_timeout).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "article"))
-                    )
-                    screenshot_data = post_element.screenshot_as_png
-                elif platform.lower() == 'twitter':
-                    post_element = WebDriverWait(self.driver, self.wait_timeout).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='tweet']"))
-                    )
-                    screenshot_data = post_element.screenshot_as_png
-                elif platform.lower() == 'youtube':
-                    post_element = WebDriverWait(self.driver, self.wait_timeout).until(
-                        EC.presence_of_element_located((By.ID, "player-container"))
-                    )
-                    screenshot_data = post_element.screenshot_as_png
-                else:
-                    screenshot_data = self.driver.get_screenshot_as_png()
+                post_element = self._wait_ready(driver, platform)
+                screenshot_data = capture_png(driver, post_element)
                 
             except (TimeoutException, WebDriverException) as e:
                 logger.warning(f"⚠️ Elemento específico não encontrado para {platform}. Capturando página inteira.")
-                screenshot_data = self.driver.get_screenshot_as_png()
+                screenshot_data = driver.get_screenshot_as_png()
             
             # Salva screenshot
             filename = f"{platform}_post_{index:03d}.png"
             filepath = session_dir / filename
             
-            with open(filepath, 'wb') as f:
-                f.write(screenshot_data)
+            filesize = write_png(str(filepath), screenshot_data)
             
-            # Otimiza imagem
-            self._optimize_screenshot(str(filepath))
+            # Otimiza imagem (pode trocar o arquivo por um .jpg)
+            if optimize:
+                optimized = self._optimize_screenshot(str(filepath))
+                if optimized:
+                    filepath, filesize = Path(optimized[0]), optimized[1]
+                    filename = filepath.name
             
             # Captura informações da página
-            page_title = self.driver.title or "Sem título"
-            page_url = self.driver.current_url
+            page_title = driver.title or "Sem título"
+            page_url = driver.current_url
             
             logger.info(f"✅ Screenshot {platform} salvo: {filepath}")
             
@@ -174,8 +242,8 @@ class VisualContentCapture:
                 'platform': platform,
                 'filename': filename,
                 'filepath': str(filepath),
-                'filesize': filepath.stat().st_size,
-                'timestamp': datetime.now().isoformat()
+                'filesize': filesize,
+                'timestamp': timestamp
             }
                 
         except Exception as e:
@@ -187,7 +255,7 @@ class VisualContentCapture:
                 'url': url,
                 'platform': platform,
                 'error': error_msg,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': timestamp
             }
 
     async def capture_viral_posts_screenshots(self, social_media_data: Dict[str, Any], session_id: str) -> Dict[str, Any]:
@@ -200,6 +268,9 @@ class VisualContentCapture:
         """
         logger.info(f"📸 Iniciando captura de posts virais para sessão {session_id}")
         
+        # Horário único do lote, repassado a cada captura
+        start_time = datetime.now().isoformat()
+        
         # Resultado da operação
         capture_results = {
             'session_id': session_id,
@@ -208,7 +279,7 @@ class VisualContentCapture:
             'failed_captures': 0,
             'viral_posts': [],
             'errors': [],
-            'start_time': datetime.now().isoformat(),
+            'start_time': start_time,
             'session_directory': None
         }
         
@@ -217,49 +288,74 @@ class VisualContentCapture:
             session_dir = self._create_session_directory(session_id)
             capture_results['session_directory'] = str(session_dir)
             
-            # Configura o driver
-            self.driver = self._setup_driver()
-            
             # Identifica posts com maior engajamento de cada plataforma
             viral_posts = self._identify_viral_posts(social_media_data)
             capture_results['total_posts_analyzed'] = len(viral_posts)
             
-            # Captura screenshots dos posts virais
+            # Descarta URLs inválidas antes de abrir qualquer navegador
+            pending = []
             for i, post_data in enumerate(viral_posts, 1):
-                try:
-                    url = post_data.get('url')
-                    platform = post_data.get('platform', 'unknown')
-                    
-                    if not url or not url.startswith(('http://', 'https://')):
-                        logger.warning(f"⚠️ URL inválida ignorada: {url}")
-                        capture_results['failed_captures'] += 1
-                        capture_results['errors'].append(f"URL inválida: {url}")
+                url = post_data.get('url')
+                if not url or not url.startswith(('http://', 'https://')):
+                    logger.warning(f"⚠️ URL inválida ignorada: {url}")
+                    capture_results['failed_captures'] += 1
+                    capture_results['errors'].append(f"URL inválida: {url}")
+                    continue
+                pending.append((i, post_data))
+            
+            pool = self._driver_pool
+            try:
+                # Valida as URLs (HEAD) enquanto o primeiro Chrome do pool sobe
+                live_urls, _ = await asyncio.gather(
+                    self._validate_urls([post_data['url'] for _, post_data in pending]),
+                    asyncio.to_thread(self._warm_up_pool, pool) if pending else asyncio.sleep(0)
+                )
+                
+                alive = []
+                for i, post_data in pending:
+                    if post_data['url'] in live_urls:
+                        alive.append((i, post_data))
                         continue
-                    
-                    # Captura o screenshot
-                    result = self._capture_social_media_post(url, platform, session_dir, i)
-                    
-                    if result['success']:
-                        result.update({
-                            'engagement_score': post_data.get('engagement_score', 0),
-                            'views': post_data.get('views', 0),
-                            'likes': post_data.get('likes', 0),
-                            'shares': post_data.get('shares', 0)
-                        })
-                        capture_results['screenshots_captured'] += 1
-                        capture_results['viral_posts'].append(result)
-                    else:
-                        capture_results['failed_captures'] += 1
-                        capture_results['errors'].append(result['error'])
-                    
-                    # Pausa entre capturas
-                    await asyncio.sleep(2)
-                    
-                except Exception as e:
-                    error_msg = f"Erro processando post viral {i}: {e}"
-                    logger.error(f"❌ {error_msg}")
+                    logger.warning(f"⚠️ URL inacessível ignorada: {post_data['url']}")
                     capture_results['failed_captures'] += 1
-                    capture_results['errors'].append(error_msg)
+                    capture_results['errors'].append(f"URL inacessível: {post_data['url']}")
+                pending = alive
+                
+                # Captura agrupando por plataforma: o driver devolvido ao pool tende a
+                # seguir com o mesmo viewport (sort estável mantém o engajamento dentro do grupo)
+                capture_order = sorted(pending, key=lambda item: item[1].get('platform', ''))
+                
+                # Captura em paralelo sobre o pool de Chromes mantido entre sessões
+                semaphore = asyncio.Semaphore(min(pool.size, len(pending)) or 1)
+                captured = await asyncio.gather(*[
+                    self._capture_pooled_post(pool, semaphore, i, post_data, session_dir, start_time)
+                    for i, post_data in capture_order
+                ])
+                results = dict(zip((i for i, _ in capture_order), captured))
+                startup_error = pool.setup_error if pending and pool.failed_to_start else None
+            finally:
+                # Não encerra os Chromes: só limpa o estado da sessão para o próximo uso
+                await asyncio.to_thread(pool.reset, self._reset_driver)
+            
+            if startup_error is not None:
+                # Nenhum navegador pôde ser iniciado
+                raise startup_error
+            
+            # Consolida na ordem de engajamento
+            for i, post_data in pending:
+                result = results[i]
+                if result['success']:
+                    result.update({
+                        'engagement_score': post_data.get('engagement_score', 0),
+                        'views': post_data.get('views', 0),
+                        'likes': post_data.get('likes', 0),
+                        'shares': post_data.get('shares', 0)
+                    })
+                    capture_results['screenshots_captured'] += 1
+                    capture_results['viral_posts'].append(result)
+                else:
+                    capture_results['failed_captures'] += 1
+                    capture_results['errors'].append(result['error'])
             
             # Finaliza a captura
             capture_results['end_time'] = datetime.now().isoformat()
@@ -270,21 +366,135 @@ class VisualContentCapture:
             error_msg = f"Erro crítico na captura de posts virais: {e}"
             logger.error(f"❌ {error_msg}")
             capture_results['critical_error'] = error_msg
-            
-        finally:
-            # Fecha o driver se estiver aberto
-            if self.driver:
-                try:
-                    self.driver.quit()
-                    logger.info("✅ Chrome driver fechado")
-                except Exception as e:
-                    logger.error(f"❌ Erro ao fechar driver: {e}")
-                self.driver = None
         
         return capture_results
 
+    async def _validate_urls(self, urls: List[str]) -> set:
+        """Dispara HEADs concorrentes e retorna as URLs que não estão comprovadamente mortas"""
+        if not urls:
+            return set()
+        try:
+            import aiohttp
+        except ImportError:
+            logger.warning("⚠️ aiohttp indisponível: URLs não pré-validadas")
+            return set(urls)
+        
+        async def is_alive(session, url: str) -> bool:
+            try:
+                async with session.head(url, allow_redirects=True) as response:
+                    return response.status not in _DEAD_URL_STATUSES
+            except aiohttp.ClientConnectorError as e:
+                # Só o domínio inexistente é definitivo; conexão recusada/bloqueada pode
+                # ser rede local, firewall ou bloqueio a HEAD e o navegador ainda abriria
+                os_error = e.os_error
+                return not (isinstance(os_error, socket.gaierror) and os_error.errno in _NXDOMAIN_ERRNOS)
+            except Exception:
+                # Timeout, proxy ou resposta inesperada: deixa o navegador decidir
+                return True
+        
+        timeout = aiohttp.ClientTimeout(total=5)
+        # trust_env: respeita HTTP(S)_PROXY/NO_PROXY como o Chrome das capturas
+        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
+            alive = await asyncio.gather(*(is_alive(session, url) for url in urls))
+        return {url for url, ok in zip(urls, alive) if ok}
+
+    def _warm_up_pool(self, pool: ChromeDriverPool):
+        """Sobe (ou reaproveita) um Chrome do pool antes da primeira captura"""
+        try:
+            with pool.driver():
+                pass
+        except Exception as e:
+            # A falha fica registrada no pool e é tratada após as capturas
+            logger.warning(f"⚠️ Chrome não iniciou no aquecimento: {e}")
+
+    async def _capture_pooled_post(
+        self,
+        pool: ChromeDriverPool,
+        semaphore: asyncio.Semaphore,
+        index: int,
+        post_data: Dict[str, Any],
+        session_dir: Path,
+        timestamp: str
+    ) -> Dict[str, Any]:
+        """Captura um post com um driver emprestado do pool; o selenium roda em thread para não bloquear o event loop"""
+        url = post_data.get('url')
+        platform = post_data.get('platform', 'unknown')
+        
+        async with semaphore:
+            try:
+                result = await asyncio.to_thread(
+                    self._capture_with_pool, pool, url, platform, session_dir, index, timestamp
+                )
+            except Exception as e:
+                error_msg = f"Erro processando post viral {index}: {e}"
+                logger.error(f"❌ {error_msg}")
+                return {'success': False, 'error': error_msg}
+        
+        # Fora do semáforo: o driver já atende a próxima captura enquanto o PNG é otimizado
+        if result['success']:
+            await self._optimize_in_background(result)
+        return result
+
+    async def _optimize_in_background(self, result: Dict[str, Any]):
+        """Otimiza o screenshot em outro processo e atualiza caminho e tamanho finais no resultado"""
+        filepath = result['filepath']
+        try:
+            final_path, result['filesize'] = await asyncio.wrap_future(submit_screenshot_optimization(filepath))
+            result['filepath'] = final_path
+            result['filename'] = os.path.basename(final_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao otimizar screenshot {filepath}: {e}")
+
+    def _reset_driver(self, driver: 'webdriver.Chrome'):
+        """Limpa cookies da sessão anterior mantendo o cache HTTP do Chrome aquecido"""
+        clear_browser_cookies(driver)
+
+    def _shutdown(self):
+        """Encerra os Chromes do pool na saída do processo"""
+        self._driver_pool.close()
+
+    def _capture_with_pool(
+        self,
+        pool: ChromeDriverPool,
+        url: str,
+        platform: str,
+        session_dir: Path,
+        index: int,
+        timestamp: str
+    ) -> Dict[str, Any]:
+        """Executa a captura com um driver livre do pool"""
+        with pool.driver() as driver:
+            return self._capture_social_media_post(
+                driver, url, platform, session_dir, index, optimize=False, timestamp=timestamp
+            )
+
     def _identify_viral_posts(self, social_media_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Identifica os posts com maior engajamento/conversão"""
+        """Identifica os posts com maior engajamento/conversão (memoizado pelo conteúdo dos dados)"""
+        try:
+            cache_key = hashlib.blake2b(
+                json.dumps(social_media_data, sort_keys=True, default=str).encode('utf-8'),
+                digest_size=16
+            ).hexdigest()
+        except Exception as e:
+            # Chaves de tipos misturados ou referências circulares não serializam: ranqueia sem cache
+            logger.warning(f"⚠️ Ranking de posts virais sem cache: {e}")
+            return self._rank_viral_posts(social_media_data)
+
+        cached = self._viral_posts_cache.get(cache_key)
+        if cached is None:
+            cached = self._rank_viral_posts(social_media_data)
+            self._viral_posts_cache[cache_key] = cached
+            if len(self._viral_posts_cache) > self._viral_posts_cache_max_size:
+                self._viral_posts_cache.popitem(last=False)
+        else:
+            self._viral_posts_cache.move_to_end(cache_key)
+        
+        return [dict(post) for post in cached]
+
+    def _rank_viral_posts(self, social_media_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Calcula o ranking dos posts com maior engajamento/conversão"""
+        import numpy as np
+
         viral_posts = []
         
         try:
@@ -296,25 +506,24 @@ class VisualContentCapture:
                 if not posts:
                     continue
                 
-                # Calcula score de engajamento para cada post
-                scored_posts = []
-                for post in posts:
-                    engagement_score = self._calculate_engagement_score(post, platform_name)
-                    if engagement_score > 0:
-                        post_data = {
-                            'url': post.get('url', ''),
-                            'platform': platform_name,
-                            'engagement_score': engagement_score,
-                            'title': post.get('title', post.get('text', post.get('caption', ''))),
-                            'views': post.get('view_count', post.get('like_count', 0)),
-                            'likes': post.get('like_count', 0),
-                            'shares': post.get('retweet_count', post.get('shares', 0))
-                        }
-                        scored_posts.append(post_data)
+                # Calcula o score de todos os posts da plataforma de uma vez
+                scores = self._calculate_engagement_scores(posts, platform_name)
                 
-                # Ordena por engajamento e pega os top 3 de cada plataforma
-                scored_posts.sort(key=lambda x: x['engagement_score'], reverse=True)
-                viral_posts.extend(scored_posts[:3])
+                # Top 3 da plataforma com score positivo (ordenação estável mantém a ordem original nos empates)
+                for idx in np.argsort(-scores, kind='stable')[:3]:
+                    engagement_score = scores[idx]
+                    if not engagement_score > 0:
+                        break
+                    post = posts[idx]
+                    viral_posts.append({
+                        'url': post.get('url', ''),
+                        'platform': platform_name,
+                        'engagement_score': self._as_score(engagement_score, platform_name),
+                        'title': post.get('title', post.get('text', post.get('caption', ''))),
+                        'views': post.get('view_count', post.get('like_count', 0)),
+                        'likes': post.get('like_count', 0),
+                        'shares': post.get('retweet_count', post.get('shares', 0))
+                    })
             
             # Ordena todos os posts por engajamento e pega os top 10 globais
             viral_posts.sort(key=lambda x: x['engagement_score'], reverse=True)
@@ -327,36 +536,44 @@ class VisualContentCapture:
         
         return viral_posts
 
-    def _calculate_engagement_score(self, post: Dict[str, Any], platform: str) -> float:
-        """Calcula score de engajamento baseado na plataforma"""
-        try:
-            if platform == 'youtube':
-                views = int(str(post.get('view_count', 0)).replace(',', ''))
-                likes = post.get('like_count', 0)
-                comments = post.get('comment_count', 0)
-                return (likes * 2 + comments * 3) / max(views, 1) * 1000
-                
-            elif platform == 'twitter':
-                likes = post.get('like_count', 0)
-                retweets = post.get('retweet_count', 0)
-                replies = post.get('reply_count', 0)
-                return likes + (retweets * 3) + (replies * 2)
-                
-            elif platform == 'instagram':
-                likes = post.get('like_count', 0)
-                comments = post.get('comment_count', 0)
-                return likes + (comments * 5)
-                
-            elif platform == 'linkedin':
-                likes = post.get('likes', 0)
-                comments = post.get('comments', 0)
-                shares = post.get('shares', 0)
-                return likes + (comments * 3) + (shares * 5)
-                
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao calcular engajamento: {e}")
+    def _calculate_engagement_scores(self, posts: List[Dict[str, Any]], platform: str) -> 'np.ndarray':
+        """Calcula os scores de engajamento de todos os posts de uma plataforma (0 para dados inválidos)"""
+        import numpy as np
+
+        formula = _ENGAGEMENT_FORMULAS.get(platform)
+        if formula is None:
+            return np.zeros(len(posts))
+        weights, fields, views_field = formula
+        
+        metrics = np.zeros((len(posts), len(fields)))
+        views = np.ones(len(posts))
+        valid = np.ones(len(posts), dtype=bool)
+        
+        for row, post in enumerate(posts):
+            try:
+                values = [post.get(field, 0) for field in fields]
+                if not all(isinstance(value, (int, float)) for value in values):
+                    raise TypeError(f"métricas não numéricas: {values}")
+                metrics[row] = values
+                if views_field:
+                    views[row] = _to_int(post.get(views_field, 0))
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao calcular engajamento: {e}")
+                valid[row] = False
         
-        return 0
+        scores = metrics @ np.asarray(weights, dtype=float)
+        if views_field:
+            scores = scores / np.maximum(views, 1) * 1000
+        scores[~valid] = 0
+        return scores
+
+    @staticmethod
+    def _as_score(score: 'np.floating', platform: str) -> float:
+        """Converte o score para tipo nativo (somas de contagens continuam inteiras)"""
+        score = float(score)
+        if _ENGAGEMENT_FORMULAS[platform][2] is None and score.is_integer():
+            return int(score)
+        return score
 
     def cleanup_old_screenshots(self, days_old: int = 7):
         """Remove screenshots antigos para economizar espaço"""
@@ -368,18 +585,31 @@ class VisualContentCapture:
             cutoff_time = time.time() - (days_old * 24 * 60 * 60)
             removed_count = 0
             
-            for session_dir in files_dir.iterdir():
-                if session_dir.is_dir():
-                    for screenshot in session_dir.glob("*.png"):
-                        if screenshot.stat().st_mtime < cutoff_time:
-                            screenshot.unlink()
+            # Uma passada com scandir: o stat de cada entrada vem do próprio DirEntry.
+            # Conta o que sobra em cada sessão para remover só os diretórios esvaziados.
+            remaining_entries = {}
+            with os.scandir(files_dir) as sessions:
+                session_paths = [entry.path for entry in sessions if entry.is_dir(follow_symlinks=False)]
+            
+            for session_path in session_paths:
+                remaining = 0
+                with os.scandir(session_path) as entries:
+                    for entry in entries:
+                        if (entry.name.endswith(('.png', '.jpg')) and entry.is_file()
+                                and entry.stat().st_mtime < cutoff_time):
+                            os.unlink(entry.path)
                             removed_count += 1
-                    
+                        else:
+                            remaining += 1
+                remaining_entries[session_path] = remaining
+            
+            for session_path, remaining in remaining_entries.items():
+                if remaining == 0:
                     # Remove diretório se estiver vazio
                     try:
-                        session_dir.rmdir()
+                        os.rmdir(session_path)
                     except OSError:
-                        pass  # Diretório não está vazio
+                        pass  # Recebeu arquivos novos após a varredura ou já foi removido
             
             if removed_count > 0:
                 logger.info(f"🧹 Removidos {removed_count} screenshots antigos")
@@ -387,6 +617,14 @@ class VisualContentCapture:
         except Exception as e:
             logger.error(f"❌ Erro na limpeza: {e}")
 
-# Instância global
-visual_content_capture = VisualContentCapture()
+@lru_cache(maxsize=1)
+def get_visual_content_capture() -> VisualContentCapture:
+    """Retorna a instância global do capturador visual (criada no primeiro uso)"""
+    return VisualContentCapture()
+
+def __getattr__(name: str):
+    """Mantém `from services.visual_content_capture import visual_content_capture` funcionando sem instanciar no import"""
+    if name == "visual_content_capture":
+        return get_visual_content_capture()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
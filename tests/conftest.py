@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos da aplicação são importados a partir de src/ (ex.: services.screenshot_optimizer)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,105 @@
+"""Isolamento entre usos de um driver do pool: cookies e caches em disco"""
+
+import http.server
+import os
+import threading
+import time
+
+import pytest
+
+from services import chrome_driver_pool
+from services.chrome_driver_pool import clear_browser_cookies
+
+
+class _FakeDriver:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url):
+        self.calls.append(('get', url))
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.calls.append((cmd, params))
+
+
+def test_clear_browser_cookies_clears_every_domain():
+    driver = _FakeDriver()
+
+    clear_browser_cookies(driver)
+
+    assert ('Network.clearBrowserCookies', {}) in driver.calls
+
+
+@pytest.fixture
+def local_origin():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), http.server.SimpleHTTPRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def chrome():
+    webdriver = pytest.importorskip('selenium.webdriver')
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    try:
+        driver = webdriver.Chrome(options=options)
+    except Exception as e:
+        pytest.skip(f"Chrome indisponível: {e}")
+    yield driver
+    driver.quit()
+
+
+def test_reset_removes_cookies_of_visited_origin(chrome, local_origin):
+    chrome.get(local_origin)
+    chrome.add_cookie({'name': 'session', 'value': 'logged-in'})
+    assert chrome.get_cookie('session') is not None
+
+    clear_browser_cookies(chrome)
+
+    chrome.get(local_origin)
+    assert chrome.get_cookies() == []
+
+
+class _QuitDriver:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def quit(self):
+        pass
+
+
+def _chrome_crashed(driver):
+    raise RuntimeError('Chrome encerrado')
+
+
+def test_pool_reuses_cache_dir_and_skips_slots_locked_elsewhere(tmp_path, monkeypatch):
+    monkeypatch.setattr(chrome_driver_pool, 'CHROME_DISK_CACHE_ROOT', str(tmp_path))
+    other_process_lock = chrome_driver_pool._lock_cache_dir(chrome_driver_pool.disk_cache_dir('capture', 0))
+
+    pool = chrome_driver_pool.ChromeDriverPool(_QuitDriver, 1, cache_name='capture')
+    with pool.driver() as driver:
+        assert driver.cache_dir == str(tmp_path / 'capture_1')
+    pool.reset(_chrome_crashed)
+    with pool.driver() as driver:
+        assert driver.cache_dir == str(tmp_path / 'capture_1')
+    pool.close()
+
+    other_process_lock.close()
+
+
+def test_pool_prunes_stale_and_legacy_cache_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(chrome_driver_pool, 'CHROME_DISK_CACHE_ROOT', str(tmp_path))
+    for name in ('capture_0', 'capture_1', 'capture_4242_0'):
+        (tmp_path / name).mkdir()
+    stale = time.time() - chrome_driver_pool.CHROME_DISK_CACHE_MAX_AGE - 60
+    os.utime(tmp_path / 'capture_1', (stale, stale))
+
+    chrome_driver_pool.ChromeDriverPool(_QuitDriver, 1, cache_name='capture').close()
+
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_dir()) == ['capture_0']
@@ -0,0 +1,28 @@
+"""Serialização do contexto do relatório da coleta massiva"""
+
+import json
+
+import pytest
+
+pytest.importorskip('aiofiles')
+
+from services.massive_data_collector import _serialize_context
+
+
+def test_serialize_context_uses_json_for_plain_context():
+    context = {'segmento': 'saúde', 'orcamento': 1000}
+
+    assert json.loads(_serialize_context(context)) == context
+
+
+def test_serialize_context_falls_back_to_repr_for_non_str_keys():
+    context = {('produto', 'preco'): 97}
+
+    assert _serialize_context(context) == repr(context)
+
+
+def test_serialize_context_falls_back_to_repr_for_circular_reference():
+    context = {'segmento': 'saúde'}
+    context['self'] = context
+
+    assert 'saúde' in _serialize_context(context)
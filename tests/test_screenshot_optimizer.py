@@ -0,0 +1,73 @@
+"""Classificação texto/foto usada por optimize_screenshot para escolher PNG ou JPEG"""
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+from PIL import ImageDraw, ImageFilter
+
+from services.screenshot_optimizer import _is_photographic, optimize_screenshot
+
+WIDTH, HEIGHT = 1200, 900
+
+
+def _text_page(navbar=False):
+    img = Image.new('RGB', (WIDTH, HEIGHT), 'white')
+    draw = ImageDraw.Draw(img)
+    if navbar:
+        draw.rectangle([0, 0, WIDTH, HEIGHT // 10], fill='#222222')
+        draw.text((20, 30), "Logo  Home  About  Contact", fill='white')
+    for y in range(HEIGHT // 8, HEIGHT - 20, 18):
+        draw.text((40, y), "Lorem ipsum dolor sit amet, consectetur adipiscing elit " * 2, fill='black')
+    return img
+
+
+def _photo(width=WIDTH, height=HEIGHT):
+    noise = [
+        Image.effect_noise((width, height), sigma).filter(ImageFilter.GaussianBlur(radius))
+        for sigma, radius in ((90, 3), (70, 5), (60, 2))
+    ]
+    gradient = Image.linear_gradient('L').resize((width, height))
+    return Image.merge('RGB', [
+        Image.blend(noise[0], gradient, 0.4),
+        Image.blend(noise[1], gradient.rotate(90), 0.3),
+        noise[2],
+    ])
+
+
+def test_text_page_is_not_photographic():
+    assert not _is_photographic(_text_page())
+
+
+def test_text_page_with_dark_navbar_is_not_photographic():
+    assert not _is_photographic(_text_page(navbar=True))
+
+
+def test_photo_is_photographic():
+    assert _is_photographic(_photo())
+
+
+def test_post_dominated_by_photo_is_photographic():
+    page = _text_page()
+    page.paste(_photo(int(WIDTH * 0.8), int(HEIGHT * 0.6)), (int(WIDTH * 0.1), int(HEIGHT * 0.15)))
+    assert _is_photographic(page)
+
+
+def test_optimize_screenshot_keeps_text_page_as_png(tmp_path):
+    filepath = tmp_path / "page.png"
+    _text_page(navbar=True).save(filepath)
+
+    path, size = optimize_screenshot(str(filepath), (1920, 1080))
+
+    assert path == str(filepath)
+    assert size > 0
+
+
+def test_optimize_screenshot_converts_photo_to_jpeg(tmp_path):
+    filepath = tmp_path / "photo.png"
+    _photo().save(filepath)
+
+    path, size = optimize_screenshot(str(filepath), (1920, 1080))
+
+    assert path.endswith('.jpg')
+    assert not filepath.exists()
+    assert size > 0